@@ -2,8 +2,10 @@
 
 from fastapi import Depends, HTTPException, status
 from typing import Annotated
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from . import auth_models
+from dependencies import get_db
+from . import auth_models, auth_crud
 # --- ИЗМЕНЕННЫЙ ИМПОРТ ---
 # Указываем полный путь от корня 'backend'
 from auth.auth_security import get_current_user
@@ -20,4 +22,26 @@ async def require_admin_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Administrator privileges are required",
         )
-    return current_user
\ No newline at end of file
+    return current_user
+
+async def require_admin_from_cookie(
+    token: Annotated[str, Depends(auth_crud.get_token_from_cookie)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> auth_models.User:
+    """
+    То же, что require_admin_user, но токен берется из cookie 'access_token',
+    как его выставляет /auth/token (фронтенд не шлет заголовок Authorization).
+    """
+    username = auth_crud.get_username_from_token(token)
+    user = await auth_crud.get_user_by_username(db, username=username) if username else None
+    if user is None or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+        )
+    if not user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Administrator privileges are required",
+        )
+    return user
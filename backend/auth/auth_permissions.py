@@ -1,5 +1,6 @@
 # Файл: backend/auth/auth_permissions.py
 
+import asyncio
 import strawberry
 from strawberry.permission import BasePermission
 from strawberry.types import Info
@@ -15,6 +16,14 @@ class IsAdmin(BasePermission):
 
     # Strawberry вызовет этот метод для проверки прав
     async def has_permission(self, source: Any, info: Info, **kwargs) -> bool:
+        # Результат проверки один на HTTP-запрос: все поля и все операции пакета
+        # (в т.ч. параллельные) ждут одну и ту же задачу вместо повторных запросов к БД
+        auth_cache = info.context.setdefault("auth_cache", {})
+        if "is_admin" not in auth_cache:
+            auth_cache["is_admin"] = asyncio.ensure_future(self._check_admin(info))
+        return await auth_cache["is_admin"]
+
+    async def _check_admin(self, info: Info) -> bool:
         request = info.context.get("request")
         if not request:
             return False
@@ -37,7 +46,6 @@ class IsAdmin(BasePermission):
             return False # Если нет сессии, нет и доступа
             
         user = await auth_crud.get_user_by_username(db_session, username=username)
-        print(f"User trying to get dashboard {user} and he has privelege {user.is_admin}")
         # Проверяем, что пользователь существует, активен и является админом
         if user and user.is_active and user.is_admin: # или user.is_admin
             return True
@@ -0,0 +1,92 @@
+# Файл: backend/benchmarks/bench_plan_encoding.py
+#
+# Сравнение текущего JSON-ответа с планом и компактного MessagePack
+# (graphic_codec) на синтетических больших планах. БД не нужна.
+# Запуск из каталога backend:
+#     python -m benchmarks.bench_plan_encoding --steps 1000 10000 50000
+#
+# Для каждого размера печатаются размер ответа (как есть и после gzip),
+# время кодирования на сервере и время разбора (аналог работы клиента).
+
+import argparse
+import gzip
+import json
+import statistics
+import time
+from typing import Callable, List
+
+import msgpack
+
+from graphic import graphic_codec
+from graphic import graphic_schemas as schemas
+
+ACTION_TYPES = ["install", "screw", "inspect", "connect"]
+
+
+def make_plan(steps: int, components: int) -> schemas.AssemblyPlan:
+    """План, где компоненты повторяются по шагам, как на реальных изделиях."""
+    component_list = [
+        {"id": 1000 + i, "name": f"Component {i} (M{4 + i % 8} fastener)", "meshId": f"Mesh_Component_{i:05d}"}
+        for i in range(components)
+    ]
+    return schemas.AssemblyPlan.model_validate({
+        "id": 1,
+        "name": "Benchmark plan",
+        "product": {"id": 1, "name": "Benchmark product", "description": "Synthetic", "modelPath": "/static/models/product_1.glb"},
+        "steps": [
+            {
+                "id": 10_000 + n,
+                "stepNumber": n + 1,
+                "actionType": ACTION_TYPES[n % len(ACTION_TYPES)],
+                "component": component_list[n % components],
+            }
+            for n in range(steps)
+        ],
+    })
+
+
+def encode_json(plan: schemas.AssemblyPlan) -> bytes:
+    # Так же, как бандл станции: model_dump(by_alias) + json.dumps
+    return json.dumps(plan.model_dump(mode="json", by_alias=True), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def timed_ms(func: Callable[[], object], repeat: int) -> float:
+    samples: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main(args: argparse.Namespace) -> None:
+    print(f"{'steps':>7} {'format':>8} {'bytes':>11} {'gzip':>10} {'encode ms':>10} {'decode ms':>10}")
+    for steps in args.steps:
+        plan = make_plan(steps, min(args.components, steps))
+        json_body = encode_json(plan)
+        compact_body = graphic_codec.encode_plan(plan)
+        # Проверяем, что компактный вариант разворачивается в тот же JSON
+        assert graphic_codec.decode_plan(compact_body) == json.loads(json_body)
+
+        rows = [
+            ("json", json_body, lambda: encode_json(plan), lambda: json.loads(json_body)),
+            ("msgpack", compact_body, lambda: graphic_codec.encode_plan(plan), lambda: msgpack.unpackb(compact_body)),
+        ]
+        for name, body, encode, decode in rows:
+            print(
+                f"{steps:>7} {name:>8} {len(body):>11,} {len(gzip.compress(body)):>10,} "
+                f"{timed_ms(encode, args.repeat):>10.2f} {timed_ms(decode, args.repeat):>10.2f}"
+            )
+
+        cache = graphic_codec.EncodedPlanCache()
+        generation = graphic_codec.current_generation()
+        cache.get(plan, generation)
+        print(f"{steps:>7} {'cached':>8} {'':>11} {'':>10} {timed_ms(lambda: cache.get(plan, generation), args.repeat):>10.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plan payload encoding benchmark (JSON vs compact MessagePack)")
+    parser.add_argument("--steps", type=int, nargs="+", default=[100, 1000, 10_000, 50_000])
+    parser.add_argument("--components", type=int, default=500, help="Number of distinct components in a plan")
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
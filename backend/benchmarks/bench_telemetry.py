@@ -0,0 +1,156 @@
+# Файл: backend/benchmarks/bench_telemetry.py
+#
+# Нагрузочный тест приема телеметрии против настоящей БД из .env.
+# Запуск из каталога backend:
+#     python -m benchmarks.bench_telemetry --product-id 1 --duration 30
+#
+# Сначала измеряется задержка чтения плана без нагрузки, затем - под
+# потоком событий от --stations станций. В конце синтетические события удаляются.
+#
+# С --no-db БД не нужна: пачки только сворачиваются в агрегаты вместо COPY,
+# и замер показывает потолок самого буфера (очередь + агрегация):
+#     python -m benchmarks.bench_telemetry --no-db --duration 10
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import List
+
+from sqlalchemy import delete
+
+from database import AsyncSessionFactory, create_tables, engine
+from graphic import graphic_crud as crud
+from telemetry import telemetry_models as models
+from telemetry.telemetry_ingest import IngestionOverloaded, StepEventBuffer
+from telemetry.telemetry_rollups import aggregate_records
+
+BENCH_STATION_PREFIX = "bench-station-"
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def measure_plan_latency(product_id: int, stop: asyncio.Event) -> List[float]:
+    """Читает план в цикле (как станции при старте) и собирает задержки в мс."""
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        async with AsyncSessionFactory() as db:
+            await crud.get_full_assembly_plan_orm(db, product_id=product_id)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def station_producer(buffer: StepEventBuffer, station: int, batch: int, stop: asyncio.Event, stats: dict) -> None:
+    computer_name = f"{BENCH_STATION_PREFIX}{station}"
+    step = 0
+    while not stop.is_set():
+        now = datetime.now(timezone.utc)
+        records = []
+        for _ in range(batch):
+            if step % 2 == 0:
+                records.append((computer_name, 0, 0, step // 2, step // 2, "start", now, None))
+            else:
+                records.append((computer_name, 0, 0, step // 2, step // 2, "finish", now, 1000 + step % 5000))
+            step += 1
+        try:
+            await buffer.submit(records)
+            stats["accepted"] += len(records)
+        except IngestionOverloaded:
+            stats["rejected"] += len(records)
+            await asyncio.sleep(0.1)
+        # Отдаем управление остальным задачам между пачками
+        await asyncio.sleep(0)
+
+
+def report(title: str, latencies: List[float]) -> None:
+    print(
+        f"{title}: n={len(latencies)} "
+        f"p50={percentile(latencies, 0.5):.2f}ms "
+        f"p95={percentile(latencies, 0.95):.2f}ms "
+        f"p99={percentile(latencies, 0.99):.2f}ms "
+        f"mean={statistics.mean(latencies):.2f}ms"
+    )
+
+
+async def aggregate_only(batch: list) -> None:
+    aggregate_records(batch)
+
+
+async def main(args: argparse.Namespace) -> None:
+    # Логирование каждого SQL-запроса исказит замеры
+    engine.echo = False
+    if not args.no_db:
+        await create_tables()
+
+        # 1. Задержка чтения плана без нагрузки
+        stop = asyncio.Event()
+        probe = asyncio.create_task(measure_plan_latency(args.product_id, stop))
+        await asyncio.sleep(args.baseline)
+        stop.set()
+        report("plan fetch, idle", await probe)
+
+    # 2. Та же задержка под потоком телеметрии
+    buffer = StepEventBuffer(
+        engine,
+        batch_size=args.batch_size,
+        flush_interval=args.flush_interval,
+        max_pending=args.max_pending,
+        enqueue_timeout=args.enqueue_timeout,
+    )
+    if args.no_db:
+        buffer._write = aggregate_only
+    await buffer.start()
+    stats = {"accepted": 0, "rejected": 0}
+    stop = asyncio.Event()
+    probe = None if args.no_db else asyncio.create_task(measure_plan_latency(args.product_id, stop))
+    producers = [
+        asyncio.create_task(station_producer(buffer, i, args.events_per_request, stop, stats))
+        for i in range(args.stations)
+    ]
+    started = time.perf_counter()
+    await asyncio.sleep(args.duration)
+    stop.set()
+    await asyncio.gather(*producers)
+    await buffer.stop()
+    elapsed = time.perf_counter() - started
+
+    if probe is not None:
+        report("plan fetch, ingesting", await probe)
+    print(
+        f"ingested {stats['accepted']} events in {elapsed:.1f}s "
+        f"= {stats['accepted'] / elapsed:,.0f} events/s "
+        f"(rejected by backpressure: {stats['rejected']})"
+    )
+
+    if args.no_db:
+        return
+
+    # 3. Убираем синтетические события и их агрегаты
+    async with AsyncSessionFactory() as db:
+        await db.execute(delete(models.StepEvent).where(models.StepEvent.computer_name.like(f"{BENCH_STATION_PREFIX}%")))
+        await db.execute(delete(models.CycleTimeRollup).where(models.CycleTimeRollup.computer_name.like(f"{BENCH_STATION_PREFIX}%")))
+        await db.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Step telemetry ingestion benchmark")
+    parser.add_argument("--product-id", type=int, help="Product whose plan is fetched as latency probe")
+    parser.add_argument("--no-db", action="store_true", help="Aggregate batches in memory instead of writing them")
+    parser.add_argument("--stations", type=int, default=300)
+    parser.add_argument("--events-per-request", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--baseline", type=float, default=10.0)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--flush-interval", type=float, default=0.5)
+    parser.add_argument("--max-pending", type=int, default=100_000)
+    parser.add_argument("--enqueue-timeout", type=float, default=2.0)
+    args = parser.parse_args()
+    if not args.no_db and args.product_id is None:
+        parser.error("--product-id is required unless --no-db is given")
+    asyncio.run(main(args))
@@ -8,6 +8,30 @@ class Settings(BaseSettings):
     MODELS_DIR: str= 'static/models'
     os.makedirs(MODELS_DIR, exist_ok=True)
     DATABASE_URL: str
+    # Сколько секунд бандл станции живет в кеше без явной инвалидации
+    STATION_BUNDLE_TTL_SECONDS: int = 60
+    # Шина инвалидации кешей: 'memory' (один процесс) или 'postgres' (LISTEN/NOTIFY между воркерами)
+    INVALIDATION_BACKEND: str = "memory"
+    # Буфер телеметрии станций: размер пачки COPY, период сброса и предел очереди
+    TELEMETRY_BATCH_SIZE: int = 2000
+    TELEMETRY_FLUSH_INTERVAL_SECONDS: float = 0.5
+    TELEMETRY_MAX_PENDING: int = 100_000
+    TELEMETRY_ENQUEUE_TIMEOUT_SECONDS: float = 2.0
+    # Ширина временной корзины агрегатов длительности шагов
+    TELEMETRY_ROLLUP_BUCKET_MINUTES: int = 60
+    # Максимум операций в одном пакетном GraphQL-запросе
+    GRAPHQL_MAX_BATCH_OPERATIONS: int = 50
+    # Снимок планов станций на диске (теплый старт и работа при недоступной БД)
+    PLAN_SNAPSHOT_PATH: str = "var/plan_snapshot.json"
+    # Сколько ждать ответа БД, прежде чем отдать станции план из снимка
+    PLAN_SNAPSHOT_DB_TIMEOUT_SECONDS: float = 0.5
+    # Бюджет времени одного SQL-оператора для GraphQL-запросов (query) и мутаций
+    DB_QUERY_TIMEOUT_SECONDS: float = 10.0
+    DB_MUTATION_TIMEOUT_SECONDS: float = 30.0
+    # Предел ожидания ответа сервера на стороне asyncpg (если statement_timeout не сработал)
+    DB_COMMAND_TIMEOUT_SECONDS: float = 60.0
+    # Отдельный пул соединений для запросов станций
+    STATION_DB_POOL_SIZE: int = 5
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,191 @@
+# Файл: backend/core/invalidation.py
+
+import asyncio
+import inspect
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Awaitable, Callable, List, Optional, Union
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Канал Postgres, через который воркеры обмениваются событиями
+CHANNEL = "cache_invalidation"
+
+# Уникальный идентификатор процесса: свои же события из LISTEN повторно не обрабатываем
+PROCESS_ID = uuid.uuid4().hex
+
+
+class InvalidationKind(str, Enum):
+    PRODUCT = "product"          # key = product_id (модель, компоненты, сам продукт)
+    PLAN = "plan"                # key = product_id, план которого изменился
+    WORKSTATION = "workstation"  # key = computer_name; None - все станции
+    USER = "user"                # key = username
+    ALL = "all"                  # сбросить все кеши (например, после потери связи)
+
+
+@dataclass(frozen=True)
+class InvalidationEvent:
+    kind: InvalidationKind
+    key: Optional[str] = None
+    origin: str = field(default=PROCESS_ID)
+
+    def to_json(self) -> str:
+        return json.dumps({"kind": self.kind.value, "key": self.key, "origin": self.origin})
+
+    @classmethod
+    def from_json(cls, payload: str) -> "InvalidationEvent":
+        data = json.loads(payload)
+        return cls(kind=InvalidationKind(data["kind"]), key=data.get("key"), origin=data["origin"])
+
+
+Handler = Callable[[InvalidationEvent], Union[None, Awaitable[None]]]
+
+
+class InvalidationBus:
+    """
+    Базовая шина инвалидации. Событие всегда сразу доставляется подписчикам
+    текущего процесса, а бэкенд отвечает за доставку остальным воркерам.
+    """
+
+    def __init__(self) -> None:
+        self._handlers: List[Handler] = []
+
+    def subscribe(self, handler: Handler) -> None:
+        self._handlers.append(handler)
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, event: InvalidationEvent) -> None:
+        await self._dispatch(event)
+        try:
+            await self._broadcast(event)
+        except Exception:
+            # publish вызывается после коммита: данные уже сохранены, и ошибка
+            # рассылки не должна превращаться в ошибку запроса
+            logger.exception("Failed to broadcast invalidation event %s", event)
+
+    async def _broadcast(self, event: InvalidationEvent) -> None:
+        pass
+
+    async def _dispatch(self, event: InvalidationEvent) -> None:
+        for handler in self._handlers:
+            try:
+                result = handler(event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                # Ошибка одного подписчика не должна ломать запрос или других подписчиков
+                logger.exception("Invalidation handler failed for %s", event)
+
+
+class InMemoryBus(InvalidationBus):
+    """Шина в пределах одного процесса: для одного воркера и для тестов."""
+
+
+class PostgresNotifyBus(InvalidationBus):
+    """Рассылает события всем воркерам через Postgres LISTEN/NOTIFY."""
+
+    def __init__(self, dsn: str, channel: str = CHANNEL, reconnect_delay: float = 1.0) -> None:
+        super().__init__()
+        self._dsn = dsn
+        self._channel = channel
+        self._reconnect_delay = reconnect_delay
+        self._conn = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopping = False
+        # Одно соединение asyncpg не выполняет команды параллельно
+        self._send_lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        self._stopping = False
+        try:
+            await self._connect()
+        except (asyncpg.PostgresError, OSError):
+            # БД еще не поднялась - приложение стартует, а шина подключится в фоне
+            logger.warning("Invalidation bus could not connect on startup, retrying in background")
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+        if self._conn and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+
+    async def _connect(self) -> None:
+        self._conn = await asyncpg.connect(self._dsn)
+        self._conn.add_termination_listener(self._on_connection_lost)
+        await self._conn.add_listener(self._channel, self._on_notification)
+
+    async def _broadcast(self, event: InvalidationEvent) -> None:
+        if self._conn is None or self._conn.is_closed():
+            # Соединение восстанавливается; после переподключения все воркеры получат ALL.
+            # До этого кеши других воркеров могут быть устаревшими (в пределах их TTL).
+            logger.warning("Invalidation bus is disconnected, event %s not broadcast", event)
+            return
+        try:
+            async with self._send_lock:
+                await self._conn.execute("SELECT pg_notify($1, $2)", self._channel, event.to_json())
+        except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError):
+            # Данные уже закоммичены, поэтому запрос из-за шины не роняем
+            logger.exception("Failed to broadcast invalidation event %s", event)
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            event = InvalidationEvent.from_json(payload)
+        except (ValueError, KeyError):
+            logger.warning("Malformed invalidation payload: %r", payload)
+            return
+        if event.origin == PROCESS_ID:
+            return
+        asyncio.get_running_loop().create_task(self._dispatch(event))
+
+    def _on_connection_lost(self, connection) -> None:
+        if not self._stopping:
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        while not self._stopping:
+            try:
+                await self._connect()
+            except Exception:
+                logger.warning("Invalidation bus reconnect failed, retrying in %ss", self._reconnect_delay)
+                await asyncio.sleep(self._reconnect_delay)
+                continue
+            # Пока связи не было, мы могли пропустить чужие события, а наши
+            # события не дошли до других воркеров - сбрасываем кеши везде
+            event = InvalidationEvent(InvalidationKind.ALL)
+            await self._dispatch(event)
+            await self._broadcast(event)
+            return
+
+
+def create_bus() -> InvalidationBus:
+    """Создает шину по настройке INVALIDATION_BACKEND ('memory' или 'postgres')."""
+    if settings.INVALIDATION_BACKEND == "postgres":
+        dsn = make_url(settings.DATABASE_URL).set(drivername="postgresql")
+        return PostgresNotifyBus(dsn.render_as_string(hide_password=False))
+    if settings.INVALIDATION_BACKEND == "memory":
+        return InMemoryBus()
+    raise ValueError(f"Unknown INVALIDATION_BACKEND: {settings.INVALIDATION_BACKEND}")
+
+
+bus = create_bus()
+
+
+async def publish(kind: InvalidationKind, key: Optional[object] = None) -> None:
+    """Публикует событие инвалидации в общую шину приложения."""
+    await bus.publish(InvalidationEvent(kind=kind, key=None if key is None else str(key)))
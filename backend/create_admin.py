@@ -3,6 +3,8 @@ import asyncio
 import asyncpg
 from passlib.context import CryptContext
 
+from core.invalidation import CHANNEL, InvalidationEvent, InvalidationKind
+
 # --- ИСПРАВЛЯЕМ НАСТРОЙКИ ---
 DB_USER = "postgres"
 DB_PASSWORD = "admin123"
@@ -39,6 +41,9 @@ async def main():
         admin_username,
         hashed_password
     )
+    # Сообщаем запущенным воркерам API, что данные пользователя могли измениться
+    event = InvalidationEvent(InvalidationKind.USER, admin_username)
+    await conn.execute("SELECT pg_notify($1, $2)", CHANNEL, event.to_json())
     print(f"Admin user '{admin_username}' created or already exists.")
     await conn.close()
 
@@ -1,7 +1,10 @@
 import os
 from dotenv import load_dotenv
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+
+from core.config import settings
 
 
 load_dotenv() # Load environment variables from .env file
@@ -14,12 +17,25 @@ if not DATABASE_URL:
 # Create an asynchronous engine
 # pool_recycle: Reconnect after this many seconds of inactivity. -1 = disable.
 # pool_pre_ping: Test connections for liveness before using them.
+# command_timeout: asyncpg client-side ceiling for any single statement, in case
+# the server stops answering and statement_timeout never fires.
 engine = create_async_engine(
     DATABASE_URL,
     echo=True, # Log SQL queries (good for debugging)
     pool_recycle=3600,
     pool_pre_ping=True,
-    
+    connect_args={"command_timeout": settings.DB_COMMAND_TIMEOUT_SECONDS},
+)
+
+# Separate small pool for station reads (plans by computer name), so that slow
+# dashboard or import requests can never take every connection stations need.
+station_engine = create_async_engine(
+    DATABASE_URL,
+    pool_size=settings.STATION_DB_POOL_SIZE,
+    max_overflow=0,
+    pool_recycle=3600,
+    pool_pre_ping=True,
+    connect_args={"command_timeout": settings.DB_COMMAND_TIMEOUT_SECONDS},
 )
 
 # Create a session factory bound to the engine
@@ -31,6 +47,33 @@ AsyncSessionFactory = sessionmaker(
     autoflush=False, # Recommended for async operations
 )
 
+StationSessionFactory = sessionmaker(
+    bind=station_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
+# --- Per-transaction statement timeout ---
+# The timeout is kept in session.info and applied with SET LOCAL at the start of
+# every transaction, so it also survives commits in the middle of a request.
+STATEMENT_TIMEOUT_KEY = "statement_timeout_ms"
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session, transaction, connection):
+    timeout_ms = session.info.get(STATEMENT_TIMEOUT_KEY)
+    if timeout_ms:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+async def set_statement_timeout(session: AsyncSession, seconds: float) -> None:
+    """Limits every statement of the session to `seconds` (the current transaction included)."""
+    timeout_ms = max(1, int(seconds * 1000))
+    session.info[STATEMENT_TIMEOUT_KEY] = timeout_ms
+    if session.in_transaction():
+        await session.execute(text(f"SET LOCAL statement_timeout = {timeout_ms}"))
+
 # Base class for our SQLAlchemy models
 Base = declarative_base()
 
@@ -0,0 +1,147 @@
+# Файл: backend/graphic/graphic_batching.py
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from graphql import OperationDefinitionNode, GraphQLError, get_operation_ast, parse
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from strawberry.fastapi import GraphQLRouter
+from strawberry.http.exceptions import HTTPException
+from strawberry.types.graphql import OperationType
+from strawberry.types.unset import UNSET
+
+from core.config import settings
+from database import AsyncSessionFactory
+from .graphic_limits import ClientDisconnected, run_until_disconnected
+
+
+MAX_BATCH_HEADER = "X-GraphQL-Max-Batch-Operations"
+SKIPPED_AFTER_ERROR = "Not executed: an earlier mutation in the batch failed."
+
+
+class BatchingGraphQLRouter(GraphQLRouter):
+    """
+    GraphQL-роутер, который кроме обычного запроса принимает в POST массив
+    операций [{query, variables, operationName}, ...] и возвращает массив
+    результатов в том же порядке.
+
+    Все операции пакета делят один контекст (request, response, сессию БД и
+    результат проверки прав). Мутации выполняются строго по порядку на общей
+    сессии. Подряд идущие запросы (query) выполняются параллельно, каждый на
+    своей сессии из пула: одну AsyncSession нельзя использовать из нескольких
+    задач одновременно.
+
+    Если мутация пакета завершилась с ошибкой, следующие мутации не выполняются
+    и получают ошибку SKIPPED_AFTER_ERROR: они обычно зависят от предыдущих.
+
+    Лимит операций в пакете сервер сообщает в заголовке MAX_BATCH_HEADER каждого
+    ответа на пакет; слишком большой пакет получает 413 с тем же заголовком.
+
+    Если клиент отключился до начала мутаций, выполнение POST-запроса
+    отменяется (см. graphic_limits.run_until_disconnected). GET (запросы из
+    строки URL и страница GraphiQL) выполняется как обычно.
+    """
+
+    async def run(self, request, context=UNSET, root_value=UNSET) -> Response:
+        if not isinstance(request, Request) or request.method != "POST":
+            return await super().run(request=request, context=context, root_value=root_value)
+        # Тело читаем заранее: Starlette кеширует его, а дальше по каналу receive
+        # приходит только http.disconnect, который ждет run_until_disconnected
+        body = await request.body()
+        try:
+            return await run_until_disconnected(request, lambda: self._run(request, body, context, root_value))
+        except ClientDisconnected:
+            # Ответ уже некому читать; код 499 виден только в логах
+            return Response(status_code=499)
+
+    async def _run(self, request: Request, body: bytes, context: Any, root_value: Any) -> Response:
+        if "json" in request.headers.get("content-type", "") and body.lstrip().startswith(b"["):
+            try:
+                response = await self._run_batch(request, context, root_value)
+            except HTTPException as e:
+                response = PlainTextResponse(e.reason, status_code=e.status_code)
+            response.headers[MAX_BATCH_HEADER] = str(settings.GRAPHQL_MAX_BATCH_OPERATIONS)
+            return response
+        return await super().run(request=request, context=context, root_value=root_value)
+
+    async def _run_batch(self, request: Request, context: Dict[str, Any], root_value: Any) -> Response:
+        operations = self.parse_json(await request.body())
+        if not operations:
+            raise HTTPException(400, "The batch must contain at least one operation.")
+        if len(operations) > settings.GRAPHQL_MAX_BATCH_OPERATIONS:
+            raise HTTPException(413, f"A batch may contain at most {settings.GRAPHQL_MAX_BATCH_OPERATIONS} operations.")
+        for operation in operations:
+            self._validate_operation(operation)
+
+        # Кеш проверки прав создаем заранее, чтобы копии контекста ссылались на один словарь
+        context.setdefault("auth_cache", {})
+        sub_response = await self.get_sub_response(request)
+
+        results: List[Optional[dict]] = [None] * len(operations)
+        query_group: List[int] = []
+
+        async def run_query_group() -> None:
+            if len(query_group) == 1:
+                index = query_group[0]
+                results[index] = await self._execute(request, operations[index], context, root_value)
+            elif query_group:
+                responses = await asyncio.gather(*(
+                    self._execute_with_own_session(request, operations[index], context, root_value)
+                    for index in query_group
+                ))
+                for index, response in zip(query_group, responses):
+                    results[index] = response
+            query_group.clear()
+
+        mutation_failed = False
+        for index, operation in enumerate(operations):
+            if self._is_mutation(operation):
+                # Мутация - граница: предыдущие запросы должны завершиться до нее
+                await run_query_group()
+                if mutation_failed:
+                    results[index] = {"data": None, "errors": [{"message": SKIPPED_AFTER_ERROR}]}
+                    continue
+                results[index] = await self._execute(request, operation, context, root_value)
+                mutation_failed = bool(results[index].get("errors"))
+            else:
+                query_group.append(index)
+        await run_query_group()
+
+        return self.create_response(response_data=results, sub_response=sub_response)
+
+    def _validate_operation(self, operation: Any) -> None:
+        if not isinstance(operation, dict):
+            raise HTTPException(400, "Each operation in a batch must be an object.")
+        if not isinstance(operation.get("query"), str):
+            raise HTTPException(400, "Each operation in a batch must have a `query` string.")
+        if not isinstance(operation.get("variables"), (dict, type(None))):
+            raise HTTPException(400, "The GraphQL operation's `variables` must be an object or null, if provided.")
+
+    def _is_mutation(self, operation: dict) -> bool:
+        try:
+            document = parse(operation["query"])
+        except GraphQLError:
+            # Ошибку синтаксиса вернет сама операция при выполнении
+            return False
+        definition: Optional[OperationDefinitionNode] = get_operation_ast(document, operation.get("operationName"))
+        return definition is not None and definition.operation.value == "mutation"
+
+    async def _execute(self, request: Request, operation: dict, context: Dict[str, Any], root_value: Any) -> dict:
+        result = await self.schema.execute(
+            operation["query"],
+            root_value=root_value,
+            variable_values=operation.get("variables"),
+            context_value=context,
+            operation_name=operation.get("operationName"),
+            allowed_operation_types={OperationType.QUERY, OperationType.MUTATION},
+            operation_extensions=operation.get("extensions"),
+        )
+        response_data = await self.process_result(request=request, result=result)
+        if result.errors:
+            self._handle_errors(result.errors, response_data)
+        return response_data
+
+    async def _execute_with_own_session(self, request: Request, operation: dict, context: Dict[str, Any], root_value: Any) -> dict:
+        async with AsyncSessionFactory() as db:
+            return await self._execute(request, operation, {**context, "db": db}, root_value)
@@ -0,0 +1,169 @@
+# Файл: backend/graphic/graphic_codec.py
+#
+# Компактное бинарное (MessagePack) представление плана сборки.
+# В JSON каждый шаг повторяет вложенный объект component целиком; здесь
+# компоненты собраны в таблицу, а шаги ссылаются на нее по индексу.
+# Строки таблиц - массивы значений, имена полей передаются один раз.
+#
+# Формат (version 1):
+#   {"v": 1, "id": ..., "name": ...,
+#    "product": {"id", "name", "description", "modelPath", "thumbnailUrl"},
+#    "componentFields": ["id", "name", "meshId"],
+#    "components": [[id, name, meshId], ...],
+#    "stepFields": ["id", "stepNumber", "actionType", "component"],
+#    "steps": [[id, stepNumber, actionType, <индекс в components>], ...]}
+
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import msgpack
+
+from core import invalidation
+from core.config import settings
+from core.invalidation import InvalidationEvent, InvalidationKind
+from . import graphic_schemas as schemas
+
+COMPACT_PLAN_VERSION = 1
+COMPONENT_FIELDS = ["id", "name", "meshId"]
+STEP_FIELDS = ["id", "stepNumber", "actionType", "component"]
+
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+# Варианты, которые встречаются в Accept у разных клиентов
+MSGPACK_MEDIA_TYPES = {MSGPACK_MEDIA_TYPE, "application/msgpack", "application/vnd.msgpack"}
+
+# Сколько закодированных планов держать в памяти
+ENCODED_PLAN_CACHE_SIZE = 256
+
+
+def compact_plan(plan: schemas.AssemblyPlan) -> dict:
+    """Переводит план в компактную структуру с таблицей компонентов."""
+    component_index: Dict[int, int] = {}
+    components = []
+    steps = []
+    for step in plan.steps:
+        component = step.component
+        index = component_index.get(component.id)
+        if index is None:
+            index = component_index[component.id] = len(components)
+            components.append([component.id, component.name, component.mesh_id])
+        steps.append([step.id, step.step_number, step.action_type, index])
+    product = plan.product
+    return {
+        "v": COMPACT_PLAN_VERSION,
+        "id": plan.id,
+        "name": plan.name,
+        "product": {
+            "id": product.id,
+            "name": product.name,
+            "description": product.description,
+            "modelPath": product.model_path,
+            "thumbnailUrl": product.thumbnail_url,
+        },
+        "componentFields": COMPONENT_FIELDS,
+        "components": components,
+        "stepFields": STEP_FIELDS,
+        "steps": steps,
+    }
+
+
+def expand_compact_plan(data: dict) -> dict:
+    """Обратное преобразование: дает тот же словарь, что и JSON-ответ (camelCase)."""
+    if data.get("v") != COMPACT_PLAN_VERSION:
+        raise ValueError(f"Unsupported compact plan version: {data.get('v')}")
+    components = [dict(zip(data["componentFields"], row)) for row in data["components"]]
+    steps = []
+    for row in data["steps"]:
+        step = dict(zip(data["stepFields"], row))
+        step["component"] = components[step["component"]]
+        steps.append(step)
+    return {"id": data["id"], "name": data["name"], "product": data["product"], "steps": steps}
+
+
+def encode_plan(plan: schemas.AssemblyPlan) -> bytes:
+    return msgpack.packb(compact_plan(plan), use_bin_type=True)
+
+
+def decode_plan(body: bytes) -> dict:
+    return expand_compact_plan(msgpack.unpackb(body, raw=False))
+
+
+def accepts_msgpack(accept: Optional[str]) -> bool:
+    """Клиент явно просит MessagePack в заголовке Accept (q=0 - это отказ)."""
+    if not accept:
+        return False
+    for item in accept.split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        if media_type.lower() in MSGPACK_MEDIA_TYPES:
+            return not any(p.replace(" ", "") in ("q=0", "q=0.0") for p in params)
+    return False
+
+
+# --- КЕШ ЗАКОДИРОВАННЫХ ПЛАНОВ ---
+# Ревизия плана - номер последнего события инвалидации, затронувшего продукт.
+# Номер растет с каждым событием, так что по нему видно, менялся ли план
+# после того, как его прочитали из БД.
+_generation = 0
+_product_changed_at: Dict[int, int] = {}
+_all_changed_at = 0
+
+
+def current_generation() -> int:
+    """Запоминается перед чтением плана из БД и передается в EncodedPlanCache.get."""
+    return _generation
+
+
+def plan_revision(product_id: int) -> int:
+    return max(_product_changed_at.get(product_id, 0), _all_changed_at)
+
+
+class EncodedPlanCache:
+    """
+    LRU-кеш байтов MessagePack по (product_id, ревизия). Один план кодируется
+    один раз, сколько бы станций его ни запрашивали. Записи дополнительно
+    живут не дольше STATION_BUNDLE_TTL_SECONDS - на случай, если план был
+    взят из снимка на диске, пока БД не отвечала.
+    """
+
+    def __init__(self, max_entries: int = ENCODED_PLAN_CACHE_SIZE, ttl: float = settings.STATION_BUNDLE_TTL_SECONDS) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[int, int], Tuple[float, int, bytes]]" = OrderedDict()
+
+    def get(self, plan: schemas.AssemblyPlan, read_at_generation: int) -> bytes:
+        product_id = plan.product.id
+        revision = plan_revision(product_id)
+        key = (product_id, revision)
+        entry = self._entries.get(key)
+        if entry and entry[1] == plan.id and time.monotonic() - entry[0] < self.ttl:
+            self._entries.move_to_end(key)
+            return entry[2]
+
+        body = encode_plan(plan)
+        # План изменился, пока его читали - такие байты не кешируем
+        if revision <= read_at_generation:
+            self._entries[key] = (time.monotonic(), plan.id, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+encoded_plan_cache = EncodedPlanCache()
+
+
+def _on_invalidation(event: InvalidationEvent) -> None:
+    global _generation, _all_changed_at
+    _generation += 1
+    if event.kind in (InvalidationKind.PRODUCT, InvalidationKind.PLAN) and event.key is not None:
+        _product_changed_at[int(event.key)] = _generation
+    elif event.kind == InvalidationKind.ALL:
+        _all_changed_at = _generation
+        _product_changed_at.clear()
+        encoded_plan_cache.clear()
+
+
+invalidation.bus.subscribe(_on_invalidation)
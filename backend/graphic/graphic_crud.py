@@ -1,10 +1,14 @@
 # Файл: backend/graphic/graphic_crud_orm.py
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, update
+from sqlalchemy import select, delete, update, func, any_, bindparam, String
+from sqlalchemy.dialects.postgresql import insert, ARRAY
 from sqlalchemy.orm import selectinload
 
+from core import invalidation
+from core.invalidation import InvalidationKind
+
 # Импортируем наши ORM-модели и Pydantic-схемы (для инпутов)
 from . import graphic_models as models
 from . import graphic_schemas as schemas
@@ -61,6 +65,41 @@ async def get_full_assembly_plan_orm(db: AsyncSession, product_id: int) -> Optio
     return plan_pydantic
 
 
+async def get_all_workstations_orm(db: AsyncSession) -> List[models.Workstation]:
+    
+    stmt = select(models.Workstation).order_by(models.Workstation.computer_name)
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+async def get_missing_product_ids_orm(db: AsyncSession, product_ids: set) -> set:
+    """Возвращает те id из набора, для которых нет продукта."""
+    stmt = select(models.Product.id).where(models.Product.id.in_(product_ids))
+    result = await db.execute(stmt)
+    return set(product_ids) - set(result.scalars().all())
+
+
+async def get_full_assembly_plans_orm(db: AsyncSession, product_ids: Optional[List[int]] = None) -> List[schemas.AssemblyPlan]:
+    """Как get_full_assembly_plan_orm, но для многих продуктов одним запросом (None - все планы)."""
+    stmt = (
+        select(models.AssemblyPlan)
+        .options(
+            selectinload(models.AssemblyPlan.steps).selectinload(models.AssemblyStep.component),
+            selectinload(models.AssemblyPlan.product)
+        )
+        .order_by(models.AssemblyPlan.id)
+    )
+    if product_ids is not None:
+        stmt = stmt.where(models.AssemblyPlan.product_id.in_(product_ids))
+    result = await db.execute(stmt)
+    return [schemas.AssemblyPlan.model_validate(plan) for plan in result.scalars().all()]
+
+async def get_workstation_products_orm(db: AsyncSession) -> List[tuple]:
+    """Пары (computer_name, product_id) всех станций."""
+    stmt = select(models.Workstation.computer_name, models.Workstation.product_id)
+    result = await db.execute(stmt)
+    return result.all()
+
+
 # --- Функции создания и обновления (Create/Update) ---
 async def create_product_orm(db: AsyncSession, name: str, description: str) -> models.Product:
     # ... (код без изменений)
@@ -68,6 +107,7 @@ async def create_product_orm(db: AsyncSession, name: str, description: str) -> m
     db.add(new_product)
     await db.commit()
     await db.refresh(new_product)
+    await invalidation.publish(InvalidationKind.PRODUCT, new_product.id)
     return new_product
 # --- File updload
 async def update_product_model_path_orm(db: AsyncSession, product_id: int, relative_path_for_db: str) -> models.Product:
@@ -75,6 +115,7 @@ async def update_product_model_path_orm(db: AsyncSession, product_id: int, relat
     stmt_update = update(models.Product).where(models.Product.id == product_id).values(model_path=relative_path_for_db)
     await db.execute(stmt_update)
     await db.commit()
+    await invalidation.publish(InvalidationKind.PRODUCT, product_id)
     return stmt_update
 
 async def add_component_orm(db: AsyncSession, component_data: schemas.ComponentInput) -> models.Component:
@@ -87,6 +128,7 @@ async def add_component_orm(db: AsyncSession, component_data: schemas.ComponentI
     db.add(new_component)
     await db.commit()
     await db.refresh(new_component)
+    await invalidation.publish(InvalidationKind.PRODUCT, component_data.product_id)
     return new_component
 
 async def create_assembly_plan_orm(db: AsyncSession, product_id: int, name: str, steps_data: List[schemas.AssemblyStepInput]) -> models.AssemblyPlan:
@@ -114,4 +156,68 @@ async def create_assembly_plan_orm(db: AsyncSession, product_id: int, name: str,
 
     await db.commit()
     await db.refresh(new_plan) # Обновляем, чтобы получить ID и связанные объекты
-    return new_plan
\ No newline at end of file
+    await invalidation.publish(InvalidationKind.PLAN, product_id)
+    return new_plan
+
+# --- Станции (Workstation) ---
+# У Postgres не больше 32767 параметров на запрос: 3 параметра на станцию
+WORKSTATION_UPSERT_CHUNK = 5000
+
+async def get_stored_computer_names_orm(db: AsyncSession, computer_names: List[str]) -> Dict[str, str]:
+    """
+    Написание, под которым станции уже хранятся в БД: lower(имя) -> имя.
+    Если в старых данных есть варианты одного имени в разном регистре, берется самая ранняя станция.
+    """
+    names = sorted({name.lower() for name in computer_names})
+    stmt = (
+        select(models.Workstation.computer_name)
+        .where(func.lower(models.Workstation.computer_name) == any_(bindparam("names", names, type_=ARRAY(String))))
+        .order_by(models.Workstation.id)
+    )
+    stored: Dict[str, str] = {}
+    for name in (await db.execute(stmt)).scalars().all():
+        stored.setdefault(name.lower(), name)
+    return stored
+
+async def upsert_workstations_orm(db: AsyncSession, workstations_data: List[schemas.WorkstationInput]) -> List[models.Workstation]:
+    """
+    Создает или обновляет станции по computer_name без учета регистра
+    в одной транзакции и публикует одно событие инвалидации на весь вызов.
+    Имя заменяется на уже сохраненное написание, поэтому ON CONFLICT
+    (computer_name) находит существующую станцию, даже если регистр другой.
+    """
+    # Повтор одной станции в одном INSERT ... ON CONFLICT недопустим - берем последнюю запись
+    latest = {w.computer_name.lower(): w.model_dump() for w in workstations_data}
+    stored = await get_stored_computer_names_orm(db, list(latest))
+    rows = [{**row, "computer_name": stored.get(key, row["computer_name"])} for key, row in latest.items()]
+
+    upserted: List[models.Workstation] = []
+    for start in range(0, len(rows), WORKSTATION_UPSERT_CHUNK):
+        stmt = insert(models.Workstation).values(rows[start:start + WORKSTATION_UPSERT_CHUNK])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.Workstation.computer_name],
+            set_={"product_id": stmt.excluded.product_id, "description": stmt.excluded.description},
+        ).returning(models.Workstation)
+        result = await db.execute(stmt, execution_options={"populate_existing": True})
+        upserted.extend(result.scalars().all())
+    await db.commit()
+    await invalidation.publish(InvalidationKind.WORKSTATION)
+    return upserted
+
+async def assign_workstations_orm(db: AsyncSession, computer_names: List[str], product_id: int) -> List[models.Workstation]:
+    """Переназначает набор станций на продукт одним UPDATE."""
+    # Станции ищутся без учета регистра, как в get_product_id_by_computer_name_orm.
+    # Имена передаются одним параметром-массивом, а не тысячами параметров IN (...)
+    names = sorted({name.lower() for name in computer_names})
+    stmt = (
+        update(models.Workstation)
+        .where(func.lower(models.Workstation.computer_name) == any_(bindparam("names", names, type_=ARRAY(String))))
+        .values(product_id=product_id)
+        .returning(models.Workstation)
+        .execution_options(populate_existing=True, synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    updated = result.scalars().all()
+    await db.commit()
+    await invalidation.publish(InvalidationKind.WORKSTATION)
+    return updated
@@ -0,0 +1,82 @@
+# Файл: backend/graphic/graphic_limits.py
+#
+# Ограничения, которые не дают одному медленному GraphQL-запросу держать
+# соединение из пула: бюджет времени на SQL-операторы и отмена резолверов,
+# когда клиент (браузер) уже отключился.
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, TypeVar
+
+from starlette.requests import Request
+from strawberry.extensions import SchemaExtension
+from strawberry.types.graphql import OperationType
+
+from core.config import settings
+from database import set_statement_timeout
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Флаг в request.state: началось выполнение мутации, отменять ее уже нельзя
+MUTATION_STARTED = "graphql_mutation_started"
+
+
+class ClientDisconnected(Exception):
+    """Клиент закрыл соединение, и выполнение запроса было отменено."""
+
+
+class OperationTimeoutExtension(SchemaExtension):
+    """
+    Перед выполнением каждой операции задает statement_timeout ее сессии:
+    DB_QUERY_TIMEOUT_SECONDS для query и DB_MUTATION_TIMEOUT_SECONDS для мутаций.
+    Зависший оператор прерывает сам Postgres, и соединение возвращается в пул.
+    """
+
+    async def on_execute(self):
+        context = self.execution_context.context
+        if self.execution_context.operation_type == OperationType.MUTATION:
+            timeout = settings.DB_MUTATION_TIMEOUT_SECONDS
+            request = context.get("request")
+            if isinstance(request, Request):
+                setattr(request.state, MUTATION_STARTED, True)
+        else:
+            timeout = settings.DB_QUERY_TIMEOUT_SECONDS
+        await set_statement_timeout(context["db"], timeout)
+        yield
+
+
+async def run_until_disconnected(request: Request, handler: Callable[[], Awaitable[T]]) -> T:
+    """
+    Выполняет handler и параллельно ждет http.disconnect от клиента. Если клиент
+    ушел, handler отменяется: его SQL-запросы прерываются, сессии закрываются.
+    Мутацию, которая уже начала выполняться, не отменяем - иначе коммит и
+    публикация инвалидации могли бы разойтись.
+    Тело запроса должно быть прочитано заранее (await request.body()).
+    """
+    work = asyncio.ensure_future(handler())
+
+    async def watch() -> None:
+        while True:
+            message = await request.receive()
+            if message["type"] == "http.disconnect":
+                return
+
+    watcher = asyncio.ensure_future(watch())
+    try:
+        await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        if not work.done() and not getattr(request.state, MUTATION_STARTED, False):
+            logger.info("Client disconnected, cancelling GraphQL request %s", request.url.path)
+            work.cancel()
+            try:
+                await work
+            except asyncio.CancelledError:
+                pass
+            raise ClientDisconnected()
+        return await work
+    finally:
+        watcher.cancel()
+        if not work.done():
+            # Нас самих отменили (например, при остановке сервера)
+            work.cancel()
@@ -1,8 +1,8 @@
 # Файл: backend/graphic/graphic_router.py
 
+from datetime import datetime
 from typing import List, Optional, Dict, Any, AsyncGenerator
 import strawberry
-from strawberry.fastapi import GraphQLRouter
 from strawberry.experimental.pydantic import type as pydantic_type
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.requests import Request
@@ -13,6 +13,11 @@ from dependencies import get_db
 from auth import auth_permissions
 from . import graphic_schemas as schemas
 from . import graphic_crud as crud
+from .graphic_batching import BatchingGraphQLRouter
+from .graphic_limits import OperationTimeoutExtension
+from telemetry import telemetry_crud
+from telemetry import telemetry_schemas
+from station.station_snapshot import resolve_station_plan
 
 # --- GraphQL ТИПЫ (определяются из Pydantic-схем) ---
 @pydantic_type(model=schemas.Component, all_fields=True)
@@ -21,12 +26,18 @@ class ComponentType: pass
 @pydantic_type(model=schemas.AssemblyStep, all_fields=True)
 class AssemblyStepType: pass
 
-@pydantic_type(model=schemas.Product, all_fields=True)
+@pydantic_type(model=schemas.Product, all_fields=True, include_computed=True)
 class ProductType: pass
 
 @pydantic_type(model=schemas.AssemblyPlan, all_fields=True)
 class AssemblyPlanType: pass
 
+@pydantic_type(model=schemas.Workstation, all_fields=True)
+class WorkstationType: pass
+
+@pydantic_type(model=telemetry_schemas.CycleTimeStats, all_fields=True)
+class CycleTimeStatsType: pass
+
 # --- GraphQL ТИПЫ ДЛЯ ВВОДА ---
 @strawberry.input
 class ComponentInput:
@@ -39,6 +50,12 @@ class AssemblyStepInput:
     component_id: int
     step_number: int
     action_type: str
+
+@strawberry.input
+class WorkstationInput:
+    computer_name: str
+    product_id: int
+    description: Optional[str] = None
     
 # --- КОРНЕВЫЕ ЗАПРОСЫ (Query) ---
 # (Без изменений)
@@ -51,11 +68,8 @@ class Query:
 
     @strawberry.field
     async def assembly_plan_by_computer_name(self, computer_name: str, info: strawberry.Info) -> Optional[AssemblyPlanType]:
-        db: AsyncSession = info.context["db"]
-        product_id = await crud.get_product_id_by_computer_name_orm(db, computer_name=computer_name)
-        if not product_id:
-            return None
-        return await crud.get_full_assembly_plan_orm(db, product_id=product_id)
+        # Станции должны стартовать и при медленной/недоступной БД - см. station_snapshot
+        return await resolve_station_plan(computer_name)
     
     @strawberry.field(permission_classes=[auth_permissions.IsAdmin])
     async def all_products(self, info: strawberry.Info) -> List[ProductType]:
@@ -74,6 +88,30 @@ class Query:
         # И возвращаем именно его!
         return plan_pydantic
 
+    @strawberry.field(permission_classes=[auth_permissions.IsAdmin])
+    async def all_workstations(self, info: strawberry.Info) -> List[WorkstationType]:
+        db: AsyncSession = info.context["db"]
+        workstations_orm = await crud.get_all_workstations_orm(db)
+        return [schemas.Workstation.model_validate(w) for w in workstations_orm]
+
+    @strawberry.field(permission_classes=[auth_permissions.IsAdmin])
+    async def cycle_time_stats(
+        self,
+        product_id: int,
+        info: strawberry.Info,
+        plan_id: Optional[int] = None,
+        computer_name: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        by_workstation: bool = True,
+    ) -> List[CycleTimeStatsType]:
+        """Статистика длительности шагов из предагрегированных корзин."""
+        db: AsyncSession = info.context["db"]
+        return await telemetry_crud.get_cycle_time_stats(
+            db, product_id, plan_id=plan_id, computer_name=computer_name,
+            since=since, until=until, by_workstation=by_workstation,
+        )
+
 # --- МУТАЦИИ (Mutation) - ПОЛНАЯ ВЕРСИЯ ---
 @strawberry.type
 class Mutation:
@@ -106,6 +144,26 @@ class Mutation:
         # Чтобы вернуть полный план, нам нужно подгрузить его заново с `selectinload`
         return await crud.get_full_assembly_plan_orm(db, product_id=new_plan.product_id)
 
+    @strawberry.field(permission_classes=[auth_permissions.IsAdmin])
+    async def upsert_workstations(self, workstations: List[WorkstationInput], info: strawberry.Info) -> List[WorkstationType]:
+        """Создает или обновляет станции (по computer_name) одной транзакцией."""
+        db: AsyncSession = info.context["db"]
+        workstations_pydantic = [schemas.WorkstationInput.model_validate(dataclasses.asdict(w)) for w in workstations]
+        missing = await crud.get_missing_product_ids_orm(db, {w.product_id for w in workstations_pydantic})
+        if missing:
+            raise ValueError(f"Products not found: {sorted(missing)}")
+        workstations_orm = await crud.upsert_workstations_orm(db, workstations_pydantic)
+        return [schemas.Workstation.model_validate(w) for w in workstations_orm]
+
+    @strawberry.field(permission_classes=[auth_permissions.IsAdmin])
+    async def assign_workstations(self, computer_names: List[str], product_id: int, info: strawberry.Info) -> List[WorkstationType]:
+        """Переназначает станции на продукт одним запросом; возвращает обновленные станции."""
+        db: AsyncSession = info.context["db"]
+        if await crud.get_missing_product_ids_orm(db, {product_id}):
+            raise ValueError(f"Product not found: {product_id}")
+        workstations_orm = await crud.assign_workstations_orm(db, computer_names, product_id)
+        return [schemas.Workstation.model_validate(w) for w in workstations_orm]
+
 
 # --- НАСТРОЙКА GraphQL ROUTER (без изменений) ---
 
@@ -113,7 +171,9 @@ async def get_context(request: Request, response: Response) -> AsyncGenerator[Di
     async for db_session in get_db():
         yield { "request": request, "response": response, "db": db_session }
 
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+# Бюджет времени SQL задается на каждую операцию отдельно (query/mutation)
+schema = strawberry.Schema(query=Query, mutation=Mutation, extensions=[OperationTimeoutExtension])
 
 # Экспортируем готовый роутер для использования в main.py
-router = GraphQLRouter(schema, context_getter=get_context, graphiql=True)
\ No newline at end of file
+# (принимает и одиночные запросы, и массив операций в одном POST)
+router = BatchingGraphQLRouter(schema, context_getter=get_context, graphiql=True)
\ No newline at end of file
@@ -4,6 +4,8 @@ from typing import List, Optional
 from pydantic import BaseModel, ConfigDict, computed_field, Field
 import os
 
+from .graphic_thumbnail_index import thumbnail_url_for
+
 # --- ФУНКЦИЯ ДЛЯ ПРЕОБРАЗОВАНИЯ ИМЕН ---
 def to_camel(string: str) -> str:
     """Преобразует snake_case в camelCase."""
@@ -42,6 +44,13 @@ class Product(BaseModel):
     name: str
     description: Optional[str] = None
     model_path: Optional[str] = None
+
+    # Превью модели (PNG рядом с GLB, см. graphic_thumbnails). Берется из индекса
+    # в памяти без обращения к диску; null, пока превью не нарисовано
+    @computed_field
+    @property
+    def thumbnail_url(self) -> Optional[str]:
+        return thumbnail_url_for(self.model_path)
     
     model_config = orm_alias_config # <-- Применяем конфиг
 
@@ -53,6 +62,14 @@ class AssemblyPlan(BaseModel):
 
     model_config = orm_alias_config # <-- Применяем конфиг
 
+class Workstation(BaseModel):
+    id: int
+    computer_name: str
+    product_id: int
+    description: Optional[str] = None
+
+    model_config = orm_alias_config # <-- Применяем конфиг
+
 
 # --- СХЕМЫ ДЛЯ ВХОДНЫХ ДАННЫХ ---
 # Для них псевдонимы не нужны
@@ -64,4 +81,9 @@ class ComponentInput(BaseModel):
 class AssemblyStepInput(BaseModel):
     component_id: int
     step_number: int
-    action_type: str
\ No newline at end of file
+    action_type: str
+
+class WorkstationInput(BaseModel):
+    computer_name: str
+    product_id: int
+    description: Optional[str] = None
@@ -0,0 +1,82 @@
+# Файл: backend/graphic/graphic_thumbnail_index.py
+#
+# Какие превью моделей уже нарисованы (см. graphic_thumbnails). Схемы читают
+# только словарь в памяти: Product.thumbnail_url не обращается к диску и не
+# тянет за собой NumPy-растеризатор. Индекс заполняется одним проходом по
+# каталогу моделей при старте, обновляется после каждого рендера в этом
+# процессе, а остальные воркеры пересканируют каталог по событию PRODUCT/ALL.
+
+import asyncio
+import logging
+import os
+from typing import Dict, Optional
+
+from core import invalidation
+from core.config import settings
+from core.invalidation import InvalidationEvent, InvalidationKind
+
+logger = logging.getLogger(__name__)
+
+# Имя PNG в каталоге моделей -> mtime_ns файла (версия для ?v= в URL).
+# Словарь целиком заменяется при сканировании, поэтому читать его можно без блокировок
+_versions: Dict[str, int] = {}
+_rescan_requested = False
+_rescan_task: Optional[asyncio.Task] = None
+
+
+def scan(models_dir: Optional[str] = None) -> None:
+    """Перечитывает список превью из каталога моделей."""
+    global _versions
+    versions: Dict[str, int] = {}
+    try:
+        with os.scandir(models_dir or settings.MODELS_DIR) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(".png") and entry.is_file():
+                    versions[entry.name] = entry.stat().st_mtime_ns
+    except FileNotFoundError:
+        pass
+    _versions = versions
+
+
+def record(thumbnail_file: str) -> None:
+    """Отмечает только что записанное превью."""
+    _versions[os.path.basename(thumbnail_file)] = os.stat(thumbnail_file).st_mtime_ns
+
+
+def forget(thumbnail_file: str) -> None:
+    _versions.pop(os.path.basename(thumbnail_file), None)
+
+
+def thumbnail_url_for(model_path: Optional[str]) -> Optional[str]:
+    """URL превью модели с версией для сброса кеша браузера; None, пока превью не нарисовано."""
+    if not model_path:
+        return None
+    base = os.path.splitext(model_path.split("?", 1)[0])[0]
+    version = _versions.get(os.path.basename(base) + ".png")
+    if version is None:
+        return None
+    return f"{base}.png?v={version}"
+
+
+async def _rescan_until_clean() -> None:
+    global _rescan_requested
+    while _rescan_requested:
+        _rescan_requested = False
+        try:
+            await asyncio.to_thread(scan)
+        except OSError as e:
+            logger.warning("Thumbnail index rescan failed: %s", e)
+
+
+def _on_invalidation(event: InvalidationEvent) -> None:
+    # Превью перерисовал другой воркер (или связь с шиной восстановилась).
+    # Пачка событий (например, импорт каталога) приводит к одному-двум проходам
+    global _rescan_requested, _rescan_task
+    if event.kind not in (InvalidationKind.PRODUCT, InvalidationKind.ALL):
+        return
+    _rescan_requested = True
+    if _rescan_task is None or _rescan_task.done():
+        _rescan_task = asyncio.ensure_future(_rescan_until_clean())
+
+
+invalidation.bus.subscribe(_on_invalidation)
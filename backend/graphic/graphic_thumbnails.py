@@ -0,0 +1,346 @@
+# Файл: backend/graphic/graphic_thumbnails.py
+#
+# Превью моделей для панели администратора. При загрузке GLB сервер сам
+# рисует небольшую PNG-картинку (без GPU): треугольники растеризуются на
+# CPU векторизованно через NumPy, с z-буфером и простым освещением.
+# PNG лежит рядом с моделью: static/models/product_1.glb -> product_1.png.
+# Рисуется фоновой задачей после ответа на загрузку; слишком большие
+# модели (больше MAX_TRIANGLES) остаются без превью. Какие превью уже есть,
+# знает graphic_thumbnail_index: до первого рендера thumbnailUrl равен null.
+#
+# Пересоздать превью для всех уже загруженных моделей (из каталога backend;
+# запущенные воркеры увидят их после перезапуска или изменения продукта):
+#     python -m graphic.graphic_thumbnails
+
+import asyncio
+import json
+import logging
+import os
+import struct
+import zlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from core import invalidation
+from core.config import settings
+from core.invalidation import InvalidationKind
+from . import graphic_thumbnail_index as thumbnail_index
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = 256
+# Рисуем в SUPERSAMPLE раз крупнее и усредняем - так края получаются сглаженными
+SUPERSAMPLE = 2
+# Сколько пар (треугольник, пиксель) обрабатывается за один проход NumPy
+RASTER_CHUNK = 2_000_000
+# Предел треугольников сцены: ограничивает память и время рендера одного превью
+MAX_TRIANGLES = 1_000_000
+
+GLB_MAGIC = 0x46546C67
+GLB_CHUNK_JSON = 0x4E4F534A
+GLB_CHUNK_BIN = 0x004E4942
+GLTF_TRIANGLES = 4
+
+COMPONENT_DTYPES = {
+    5120: np.int8, 5121: np.uint8, 5122: np.int16,
+    5123: np.uint16, 5125: np.uint32, 5126: np.float32,
+}
+TYPE_SIZES = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT4": 16}
+
+DEFAULT_COLOR = (0.78, 0.78, 0.8)
+# Направление на источник света в координатах камеры
+LIGHT_DIR = np.array([-0.4, 0.6, 0.7]) / np.linalg.norm([-0.4, 0.6, 0.7])
+
+
+class ThumbnailError(ValueError):
+    """Файл не является GLB или в нем нет треугольников, которые можно нарисовать."""
+
+
+# --- ЧТЕНИЕ GLB ---
+def _read_glb(data: bytes) -> Tuple[dict, bytes]:
+    if len(data) < 20:
+        raise ThumbnailError("File is too short to be a GLB")
+    magic, _version, _length = struct.unpack_from("<3I", data, 0)
+    if magic != GLB_MAGIC:
+        raise ThumbnailError("Not a GLB file")
+    gltf, binary, offset = None, b"", 12
+    while offset + 8 <= len(data):
+        chunk_length, chunk_type = struct.unpack_from("<2I", data, offset)
+        chunk = data[offset + 8:offset + 8 + chunk_length]
+        if chunk_type == GLB_CHUNK_JSON:
+            gltf = json.loads(chunk)
+        elif chunk_type == GLB_CHUNK_BIN:
+            binary = chunk
+        offset += 8 + chunk_length
+    if gltf is None:
+        raise ThumbnailError("GLB has no JSON chunk")
+    return gltf, binary
+
+
+def _read_accessor(gltf: dict, binary: bytes, index: int) -> np.ndarray:
+    accessor = gltf["accessors"][index]
+    dtype = np.dtype(COMPONENT_DTYPES[accessor["componentType"]])
+    components = TYPE_SIZES[accessor["type"]]
+    count = accessor["count"]
+    if "bufferView" not in accessor:
+        # Разреженные аксессоры без основы в превью не поддерживаем
+        return np.zeros((count, components), dtype=dtype)
+    view = gltf["bufferViews"][accessor["bufferView"]]
+    if view.get("buffer", 0) != 0:
+        raise ThumbnailError("External buffers are not supported in GLB thumbnails")
+    start = view.get("byteOffset", 0) + accessor.get("byteOffset", 0)
+    stride = view.get("byteStride") or dtype.itemsize * components
+    array = np.ndarray(
+        shape=(count, components), dtype=dtype, buffer=binary,
+        offset=start, strides=(stride, dtype.itemsize),
+    )
+    return array.copy()
+
+
+def _node_matrix(node: dict) -> np.ndarray:
+    if "matrix" in node:
+        # В glTF матрицы хранятся по столбцам
+        return np.array(node["matrix"], dtype=np.float64).reshape(4, 4).T
+    matrix = np.eye(4)
+    x, y, z, w = node.get("rotation", (0.0, 0.0, 0.0, 1.0))
+    matrix[:3, :3] = [
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ]
+    matrix[:3, :3] *= np.asarray(node.get("scale", (1.0, 1.0, 1.0)))
+    matrix[:3, 3] = node.get("translation", (0.0, 0.0, 0.0))
+    return matrix
+
+
+def _material_color(gltf: dict, index: Optional[int]) -> Tuple[float, float, float]:
+    if index is None:
+        return DEFAULT_COLOR
+    material = gltf.get("materials", [])[index]
+    spec_gloss = material.get("extensions", {}).get("KHR_materials_pbrSpecularGlossiness")
+    if spec_gloss is not None:
+        factor, textured = spec_gloss.get("diffuseFactor"), "diffuseTexture" in spec_gloss
+    else:
+        pbr = material.get("pbrMetallicRoughness", {})
+        factor, textured = pbr.get("baseColorFactor"), "baseColorTexture" in pbr
+    if factor is None or (textured and factor[:3] == [1.0, 1.0, 1.0]):
+        # Текстуры не читаем: белый множитель под текстурой рисуем нейтральным серым
+        return DEFAULT_COLOR
+    return tuple(factor[:3])
+
+
+def load_glb_triangles(data: bytes, max_triangles: int = MAX_TRIANGLES) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Возвращает все треугольники сцены в мировых координатах, shape (N, 3, 3),
+    и цвет каждого треугольника, shape (N, 3). Если треугольников больше
+    max_triangles, бросает ThumbnailError, не читая буферы.
+    """
+    gltf, binary = _read_glb(data)
+    nodes = gltf.get("nodes", [])
+    scenes = gltf.get("scenes")
+    if scenes:
+        roots = scenes[gltf.get("scene", 0)].get("nodes", [])
+    else:
+        children = {child for node in nodes for child in node.get("children", [])}
+        roots = [i for i in range(len(nodes)) if i not in children]
+
+    triangles: List[np.ndarray] = []
+    colors: List[np.ndarray] = []
+    total = 0
+    stack = [(index, np.eye(4)) for index in roots]
+    while stack:
+        index, parent = stack.pop()
+        node = nodes[index]
+        world = parent @ _node_matrix(node)
+        stack.extend((child, world) for child in node.get("children", []))
+        if "mesh" not in node:
+            continue
+        for primitive in gltf["meshes"][node["mesh"]]["primitives"]:
+            attributes = primitive.get("attributes", {})
+            if primitive.get("mode", GLTF_TRIANGLES) != GLTF_TRIANGLES or "POSITION" not in attributes:
+                continue
+            if "KHR_draco_mesh_compression" in primitive.get("extensions", {}):
+                continue
+            # Число треугольников известно из accessor заранее
+            total += gltf["accessors"][primitive.get("indices", attributes["POSITION"])]["count"] // 3
+            if total > max_triangles:
+                raise ThumbnailError(f"Model has more than {max_triangles} triangles")
+            positions = _read_accessor(gltf, binary, attributes["POSITION"]).astype(np.float64)
+            if "indices" in primitive:
+                indices = _read_accessor(gltf, binary, primitive["indices"]).reshape(-1).astype(np.int64)
+            else:
+                indices = np.arange(len(positions))
+            indices = indices[: len(indices) // 3 * 3]
+            positions = positions @ world[:3, :3].T + world[:3, 3]
+            triangles.append(positions[indices].reshape(-1, 3, 3))
+            color = _material_color(gltf, primitive.get("material"))
+            colors.append(np.broadcast_to(np.asarray(color, dtype=np.float64), (len(indices) // 3, 3)))
+
+    if not triangles:
+        raise ThumbnailError("GLB contains no triangle meshes")
+    return np.concatenate(triangles), np.concatenate(colors)
+
+
+# --- РАСТЕРИЗАЦИЯ ---
+def _view_rotation(yaw_deg: float = 35.0, pitch_deg: float = 25.0) -> np.ndarray:
+    """Камера смотрит на модель сбоку-сверху (ось Y в glTF направлена вверх)."""
+    yaw, pitch = np.radians(yaw_deg), np.radians(pitch_deg)
+    rotate_y = np.array([[np.cos(yaw), 0, np.sin(yaw)], [0, 1, 0], [-np.sin(yaw), 0, np.cos(yaw)]])
+    rotate_x = np.array([[1, 0, 0], [0, np.cos(pitch), -np.sin(pitch)], [0, np.sin(pitch), np.cos(pitch)]])
+    return rotate_x @ rotate_y
+
+
+def render_triangles(triangles: np.ndarray, colors: np.ndarray, size: int = THUMBNAIL_SIZE) -> np.ndarray:
+    """
+    Ортографическая проекция, z-буфер и плоское освещение. Возвращает RGBA
+    uint8 shape (size, size, 4) с прозрачным фоном.
+    """
+    canvas = size * SUPERSAMPLE
+    view = triangles @ _view_rotation().T
+
+    # Масштаб подбирается так, чтобы модель заняла кадр с небольшим полем
+    flat = view.reshape(-1, 3)
+    low, high = flat[:, :2].min(axis=0), flat[:, :2].max(axis=0)
+    extent = max(float((high - low).max()), 1e-9)
+    scale = canvas * 0.9 / extent
+    center = (low + high) / 2
+    screen_x = (view[:, :, 0] - center[0]) * scale + canvas / 2
+    screen_y = canvas / 2 - (view[:, :, 1] - center[1]) * scale
+    depth = view[:, :, 2]
+
+    # Освещение двустороннее: нормали в моделях часто развернуты как попало
+    normals = np.cross(view[:, 1] - view[:, 0], view[:, 2] - view[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    valid = lengths > 0
+    shade = np.full(len(view), 0.35)
+    shade[valid] += 0.65 * np.abs(normals[valid] @ LIGHT_DIR) / lengths[valid]
+    shaded = np.clip(colors * shade[:, None], 0.0, 1.0)
+
+    # Пиксели, центры которых попадают в габариты треугольника
+    x0 = np.clip(np.ceil(screen_x.min(axis=1) - 0.5), 0, canvas).astype(np.int64)
+    x1 = np.clip(np.floor(screen_x.max(axis=1) - 0.5), -1, canvas - 1).astype(np.int64)
+    y0 = np.clip(np.ceil(screen_y.min(axis=1) - 0.5), 0, canvas).astype(np.int64)
+    y1 = np.clip(np.floor(screen_y.max(axis=1) - 0.5), -1, canvas - 1).astype(np.int64)
+    widths = np.maximum(x1 - x0 + 1, 0)
+    heights = np.maximum(y1 - y0 + 1, 0)
+    area = ((screen_x[:, 1] - screen_x[:, 0]) * (screen_y[:, 2] - screen_y[:, 0])
+            - (screen_x[:, 2] - screen_x[:, 0]) * (screen_y[:, 1] - screen_y[:, 0]))
+    visible = np.nonzero((widths > 0) & (heights > 0) & (np.abs(area) > 1e-12))[0]
+
+    zbuffer = np.full(canvas * canvas, -np.inf)
+    color_buffer = np.zeros((canvas * canvas, 3))
+    covered = np.zeros(canvas * canvas, dtype=bool)
+
+    # Делим треугольники на пачки так, чтобы число пар (треугольник, пиксель) было ограничено
+    cumulative = np.cumsum(widths[visible] * heights[visible])
+    start = 0
+    while start < len(visible):
+        done = cumulative[start - 1] if start else 0
+        stop = max(int(np.searchsorted(cumulative, done + RASTER_CHUNK, side="right")), start + 1)
+        chunk = visible[start:stop]
+        start = stop
+        chunk_counts = widths[chunk] * heights[chunk]
+        tri = np.repeat(chunk, chunk_counts)
+        local = np.arange(len(tri)) - np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+        px = x0[tri] + local % widths[tri]
+        py = y0[tri] + local // widths[tri]
+        cx, cy = px + 0.5, py + 0.5
+
+        # Барицентрические координаты центра пикселя
+        xs, ys = screen_x[tri], screen_y[tri]
+        w0 = ((xs[:, 1] - cx) * (ys[:, 2] - cy) - (xs[:, 2] - cx) * (ys[:, 1] - cy)) / area[tri]
+        w1 = ((xs[:, 2] - cx) * (ys[:, 0] - cy) - (xs[:, 0] - cx) * (ys[:, 2] - cy)) / area[tri]
+        w2 = 1.0 - w0 - w1
+        inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+        tri, w0, w1, w2 = tri[inside], w0[inside], w1[inside], w2[inside]
+        pixel = py[inside] * canvas + px[inside]
+        z = w0 * depth[tri, 0] + w1 * depth[tri, 1] + w2 * depth[tri, 2]
+
+        # Ближе к камере - больше z; побеждает фрагмент с максимальной глубиной
+        np.maximum.at(zbuffer, pixel, z)
+        winners = z >= zbuffer[pixel]
+        color_buffer[pixel[winners]] = shaded[tri[winners]]
+        covered[pixel[winners]] = True
+
+    # Усреднение блоков SUPERSAMPLE x SUPERSAMPLE; цвет - только по закрытым подпикселям
+    blocks = (size, SUPERSAMPLE, size, SUPERSAMPLE)
+    coverage = covered.reshape(blocks).sum(axis=(1, 3))
+    color_sum = (color_buffer * covered[:, None]).reshape(size, SUPERSAMPLE, size, SUPERSAMPLE, 3).sum(axis=(1, 3))
+    rgba = np.zeros((size, size, 4))
+    rgba[..., :3] = color_sum / np.maximum(coverage, 1)[..., None]
+    rgba[..., 3] = coverage / SUPERSAMPLE ** 2
+    return np.round(rgba * 255).astype(np.uint8)
+
+
+# --- PNG ---
+def _png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """Минимальный PNG (RGBA, 8 бит) без сторонних библиотек."""
+    height, width, _ = rgba.shape
+    # Перед каждой строкой - байт фильтра 0 (без фильтра)
+    raw = np.concatenate([np.zeros((height, 1), dtype=np.uint8), rgba.reshape(height, width * 4)], axis=1)
+    return b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        _png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)),
+        _png_chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)),
+        _png_chunk(b"IEND", b""),
+    ))
+
+
+# --- ФАЙЛЫ ---
+def thumbnail_file_for(model_file: str) -> str:
+    return os.path.splitext(model_file)[0] + ".png"
+
+
+def render_glb_thumbnail(model_file: str, size: int = THUMBNAIL_SIZE) -> str:
+    """Рисует превью модели и атомарно сохраняет его рядом с GLB. Возвращает путь к PNG."""
+    with open(model_file, "rb") as f:
+        triangles, colors = load_glb_triangles(f.read())
+    png = encode_png(render_triangles(triangles, colors, size))
+    thumbnail_file = thumbnail_file_for(model_file)
+    tmp_file = f"{thumbnail_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(png)
+    os.replace(tmp_file, thumbnail_file)
+    thumbnail_index.record(thumbnail_file)
+    return thumbnail_file
+
+
+def refresh_thumbnail(model_file: str) -> None:
+    """
+    Фоновая задача после загрузки модели: перерисовывает превью. Ошибка
+    не всплывает, а старое превью удаляется, чтобы не показывать чужую модель.
+    """
+    try:
+        render_glb_thumbnail(model_file)
+    except (ThumbnailError, OSError, KeyError, IndexError, ValueError) as e:
+        logger.warning("Thumbnail rendering failed for %s: %s", model_file, e)
+        thumbnail_index.forget(thumbnail_file_for(model_file))
+        try:
+            os.remove(thumbnail_file_for(model_file))
+        except FileNotFoundError:
+            pass
+
+
+async def render_after_upload(model_file: str, product_id: int) -> None:
+    """
+    Фоновая задача после ответа на загрузку: рисует превью в пуле потоков и
+    публикует изменение продукта, чтобы кеши планов и индексы превью других
+    воркеров получили новый thumbnailUrl.
+    """
+    await asyncio.to_thread(refresh_thumbnail, model_file)
+    await invalidation.publish(InvalidationKind.PRODUCT, product_id)
+
+
+if __name__ == "__main__":
+    for name in sorted(os.listdir(settings.MODELS_DIR)):
+        if name.lower().endswith(".glb"):
+            path = os.path.join(settings.MODELS_DIR, name)
+            try:
+                print(f"{path} -> {render_glb_thumbnail(path)}")
+            except (ThumbnailError, OSError, KeyError, IndexError, ValueError) as e:
+                print(f"{path}: skipped ({e})")
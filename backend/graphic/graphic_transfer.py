@@ -0,0 +1,355 @@
+# Файл: backend/graphic/graphic_transfer.py
+#
+# Потоковый перенос конфигурации линии между заводами в формате NDJSON:
+# одна строка - одна запись {"type": ..., ...}. Экспорт читает таблицы
+# серверным курсором (yield_per), импорт разбирает тело запроса по строкам
+# и пишет пачками в отдельных транзакциях, переназначая id.
+# Файлы моделей (static/models) в выгрузку не входят: после импорта модели
+# новых продуктов загружаются заново, у существующих остается прежняя модель.
+
+import json
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Annotated, AsyncIterator, Callable, Dict, Hashable, List, Optional, Set
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth import auth_models
+from auth.auth_dependencies import require_admin_from_cookie
+from core import invalidation
+from core.invalidation import InvalidationKind
+from database import AsyncSessionFactory
+from dependencies import get_db
+from . import graphic_crud as crud
+from . import graphic_models as models
+
+FORMAT_VERSION = 1
+# Сколько строк читается из курсора и пишется в БД за раз
+EXPORT_CHUNK_SIZE = 1000
+IMPORT_BATCH_SIZE = 1000
+# Самая длинная допустимая строка NDJSON (одна запись каталога - сотни байт)
+MAX_LINE_BYTES = 1024 * 1024
+
+# Типы записей в порядке зависимостей: родители всегда идут раньше детей
+EXPORT_TABLES = (
+    ("product", models.Product.__table__, ("id", "name", "description")),
+    ("component", models.Component.__table__, ("id", "product_id", "name", "mesh_id")),
+    ("plan", models.AssemblyPlan.__table__, ("id", "product_id", "name")),
+    ("step", models.AssemblyStep.__table__, ("id", "plan_id", "component_id", "step_number", "action_type")),
+    ("workstation", models.Workstation.__table__, ("id", "computer_name", "product_id", "description")),
+)
+
+router = APIRouter()
+
+
+class CatalogImportError(ValueError):
+    """Некорректная строка или ссылка на неизвестный id во входном файле."""
+
+
+@dataclass
+class ImportStats:
+    products: int = 0
+    components: int = 0
+    plans: int = 0
+    steps: int = 0
+    workstations: int = 0
+
+
+# --- ЭКСПОРТ ---
+async def export_catalog_ndjson(db: AsyncSession) -> AsyncIterator[bytes]:
+    """
+    Отдает весь каталог построчно; в памяти одновременно не больше EXPORT_CHUNK_SIZE строк.
+    Все таблицы должны читаться в одной транзакции (см. _export_stream), иначе
+    правки во время выгрузки дадут ссылки на отсутствующие в файле id.
+    """
+    header = {"type": "header", "version": FORMAT_VERSION, "exportedAt": datetime.now(timezone.utc).isoformat()}
+    yield (json.dumps(header) + "\n").encode("utf-8")
+
+    for record_type, table, columns in EXPORT_TABLES:
+        stmt = (
+            select(*(table.c[name] for name in columns))
+            .order_by(table.c.id)
+            .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        result = await db.stream(stmt)
+        async for rows in result.mappings().partitions():
+            chunk = "".join(
+                json.dumps({"type": record_type, **row}, ensure_ascii=False) + "\n" for row in rows
+            )
+            yield chunk.encode("utf-8")
+
+
+async def _export_stream() -> AsyncIterator[bytes]:
+    # Своя сессия: зависимость get_db закрывается раньше, чем закончится отдача потока.
+    # Один снимок БД на всю выгрузку: REPEATABLE READ, только чтение.
+    async with AsyncSessionFactory() as db:
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ", "postgresql_readonly": True})
+        async for chunk in export_catalog_ndjson(db):
+            yield chunk
+
+
+# --- ИМПОРТ ---
+async def iter_ndjson(chunks: AsyncIterator[bytes], max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[dict]:
+    """
+    Разбирает поток байт на JSON-объекты по строкам, не читая тело целиком.
+    Недописанная строка копится в bytearray; строка длиннее max_line_bytes -
+    ошибка с номером строки, чтобы один битый файл не съел всю память.
+    """
+    buffer = bytearray()
+    line_number = 0
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            buffer += chunk[start:end]
+            line_number += 1
+            _check_line_length(buffer, line_number, max_line_bytes)
+            if buffer.strip():
+                yield _parse_line(bytes(buffer), line_number)
+            buffer.clear()
+            start = end + 1
+        buffer += chunk[start:]
+        _check_line_length(buffer, line_number + 1, max_line_bytes)
+    if buffer.strip():
+        yield _parse_line(bytes(buffer), line_number + 1)
+
+
+def _check_line_length(line: bytearray, line_number: int, max_line_bytes: int) -> None:
+    if len(line) > max_line_bytes:
+        raise CatalogImportError(f"Line {line_number}: longer than {max_line_bytes} bytes")
+
+
+def _parse_line(line: bytes, line_number: int) -> dict:
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        raise CatalogImportError(f"Line {line_number}: invalid JSON ({e})")
+    if not isinstance(record, dict) or "type" not in record:
+        raise CatalogImportError(f"Line {line_number}: record must be an object with a 'type' field")
+    return record
+
+
+def _last_by_key(rows: List[dict], key: Callable[[dict], Hashable]) -> List[dict]:
+    """
+    Оставляет по одной строке на ключ конфликта (побеждает последняя): INSERT
+    ... ON CONFLICT DO UPDATE не может обновить одну строку дважды за оператор.
+    """
+    return list({key(row): row for row in rows}.values())
+
+
+class CatalogImporter:
+    """
+    Копит записи одного типа и записывает их пачкой (одна транзакция на пачку).
+    Старые id из файла переназначаются на новые через словари old_id -> new_id.
+    Продукты сопоставляются по имени, остальное - по уникальным ключам таблиц.
+    model_path не импортируется: у существующих продуктов он не меняется,
+    у новых остается пустым до загрузки модели.
+    """
+
+    def __init__(self, db: AsyncSession, batch_size: int = IMPORT_BATCH_SIZE) -> None:
+        self.db = db
+        self.batch_size = batch_size
+        self.stats = ImportStats()
+        self._product_ids: Dict[int, int] = {}
+        self._component_ids: Dict[int, int] = {}
+        self._plan_ids: Dict[int, int] = {}
+        # Продукты, чьи старые планы уже заменены в рамках этого импорта
+        self._replaced_plans: Set[int] = set()
+        self._batch_type: Optional[str] = None
+        self._batch: List[dict] = []
+
+    async def add(self, record: dict) -> None:
+        record_type = record["type"]
+        if record_type == "header":
+            if record.get("version") != FORMAT_VERSION:
+                raise CatalogImportError(f"Unsupported export version: {record.get('version')}")
+            return
+        if record_type not in self._writers:
+            raise CatalogImportError(f"Unknown record type: {record_type}")
+        if record_type != self._batch_type or len(self._batch) >= self.batch_size:
+            await self.flush()
+            self._batch_type = record_type
+        self._batch.append(record)
+
+    async def flush(self) -> None:
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        try:
+            await self._writers[self._batch_type](self, batch)
+            await self.db.commit()
+        except (KeyError, TypeError) as e:
+            await self.db.rollback()
+            raise CatalogImportError(f"{self._batch_type} record has missing or invalid field: {e}")
+        except (CatalogImportError, IntegrityError, DataError) as e:
+            await self.db.rollback()
+            if isinstance(e, CatalogImportError):
+                raise
+            raise CatalogImportError(f"{self._batch_type} batch rejected by the database: {e.orig}")
+
+    def _remap(self, mapping: Dict[int, int], old_id: int, what: str) -> int:
+        try:
+            return mapping[old_id]
+        except KeyError:
+            raise CatalogImportError(f"Reference to unknown {what} id {old_id}")
+
+    async def _write_products(self, batch: List[dict]) -> None:
+        names = {r["name"] for r in batch}
+        stmt = select(models.Product.id, models.Product.name).where(models.Product.name.in_(names)).order_by(models.Product.id)
+        existing: Dict[str, int] = {}
+        for product_id, name in (await self.db.execute(stmt)).all():
+            existing.setdefault(name, product_id)
+
+        updates, inserts = [], []
+        for r in batch:
+            values = {"name": r["name"], "description": r.get("description")}
+            if r["name"] in existing:
+                self._product_ids[r["id"]] = existing[r["name"]]
+                updates.append({"id": existing[r["name"]], **values})
+            else:
+                inserts.append((r["id"], values))
+
+        if updates:
+            # Массовый UPDATE по первичному ключу
+            await self.db.execute(update(models.Product), updates)
+        if inserts:
+            stmt = insert(models.Product).returning(models.Product.id, sort_by_parameter_order=True)
+            result = await self.db.execute(stmt, [values for _, values in inserts])
+            for (old_id, _), new_id in zip(inserts, result.scalars().all()):
+                self._product_ids[old_id] = new_id
+        self.stats.products += len(batch)
+
+    async def _write_components(self, batch: List[dict]) -> None:
+        rows = [
+            {
+                "product_id": self._remap(self._product_ids, r["product_id"], "product"),
+                "name": r["name"],
+                "mesh_id": r["mesh_id"],
+            }
+            for r in batch
+        ]
+        stmt = insert(models.Component).values(_last_by_key(rows, lambda row: (row["product_id"], row["mesh_id"])))
+        stmt = stmt.on_conflict_do_update(
+            constraint="_product_mesh_uc",
+            set_={"name": stmt.excluded.name},
+        ).returning(models.Component.id, models.Component.product_id, models.Component.mesh_id)
+        new_ids = {(product_id, mesh_id): new_id for new_id, product_id, mesh_id in (await self.db.execute(stmt)).all()}
+        for r, row in zip(batch, rows):
+            self._component_ids[r["id"]] = new_ids[(row["product_id"], row["mesh_id"])]
+        self.stats.components += len(batch)
+
+    async def _write_plans(self, batch: List[dict]) -> None:
+        rows = [
+            (r["id"], {"product_id": self._remap(self._product_ids, r["product_id"], "product"), "name": r["name"]})
+            for r in batch
+        ]
+        # Как и create_assembly_plan_orm: новый план заменяет старый план продукта
+        to_replace = {values["product_id"] for _, values in rows} - self._replaced_plans
+        if to_replace:
+            await self.db.execute(delete(models.AssemblyPlan).where(models.AssemblyPlan.product_id.in_(to_replace)))
+            self._replaced_plans |= to_replace
+        stmt = insert(models.AssemblyPlan).returning(models.AssemblyPlan.id, sort_by_parameter_order=True)
+        result = await self.db.execute(stmt, [values for _, values in rows])
+        for (old_id, _), new_id in zip(rows, result.scalars().all()):
+            self._plan_ids[old_id] = new_id
+        self.stats.plans += len(batch)
+
+    async def _write_steps(self, batch: List[dict]) -> None:
+        rows = [
+            {
+                "plan_id": self._remap(self._plan_ids, r["plan_id"], "plan"),
+                "component_id": self._remap(self._component_ids, r["component_id"], "component"),
+                "step_number": r["step_number"],
+                "action_type": r["action_type"],
+            }
+            for r in batch
+        ]
+        stmt = insert(models.AssemblyStep).values(_last_by_key(rows, lambda row: (row["plan_id"], row["step_number"])))
+        stmt = stmt.on_conflict_do_update(
+            constraint="_plan_step_uc",
+            set_={"component_id": stmt.excluded.component_id, "action_type": stmt.excluded.action_type},
+        )
+        await self.db.execute(stmt)
+        self.stats.steps += len(batch)
+
+    async def _write_workstations(self, batch: List[dict]) -> None:
+        # Как и upsert_workstations_orm: имена станций без учета регистра,
+        # существующие станции сохраняют свое написание
+        stored = await crud.get_stored_computer_names_orm(self.db, [r["computer_name"] for r in batch])
+        rows = [
+            {
+                "computer_name": stored.get(r["computer_name"].lower(), r["computer_name"]),
+                "product_id": self._remap(self._product_ids, r["product_id"], "product"),
+                "description": r.get("description"),
+            }
+            for r in batch
+        ]
+        stmt = insert(models.Workstation).values(_last_by_key(rows, lambda row: row["computer_name"].lower()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.Workstation.computer_name],
+            set_={"product_id": stmt.excluded.product_id, "description": stmt.excluded.description},
+        )
+        await self.db.execute(stmt)
+        self.stats.workstations += len(batch)
+
+    _writers = {
+        "product": _write_products,
+        "component": _write_components,
+        "plan": _write_plans,
+        "step": _write_steps,
+        "workstation": _write_workstations,
+    }
+
+
+async def import_catalog_ndjson(db: AsyncSession, chunks: AsyncIterator[bytes]) -> ImportStats:
+    """Импортирует поток NDJSON; уже записанные пачки остаются, если дальше будет ошибка."""
+    importer = CatalogImporter(db)
+    try:
+        async for record in iter_ndjson(chunks):
+            await importer.add(record)
+        await importer.flush()
+    finally:
+        # Затронуты продукты, планы и станции сразу - проще сбросить все кеши
+        if importer.stats != ImportStats():
+            await invalidation.publish(InvalidationKind.ALL)
+    return importer.stats
+
+
+# --- ЭНДПОИНТЫ ---
+@router.get("/export", tags=["Catalog"])
+async def export_catalog(
+    user: Annotated[auth_models.User, Depends(require_admin_from_cookie)],
+):
+    """
+    Выгружает продукты, компоненты, планы и станции одним NDJSON-потоком
+    (согласованный снимок БД). Файлы 3D-моделей в выгрузку не входят.
+    """
+    filename = f"catalog-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.ndjson"
+    return StreamingResponse(
+        _export_stream(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/import", tags=["Catalog"])
+async def import_catalog(
+    request: Request,
+    user: Annotated[auth_models.User, Depends(require_admin_from_cookie)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> dict:
+    """
+    Загружает NDJSON, полученный из /catalog/export (тело читается потоком).
+    Модели не переносятся: у новых продуктов modelPath пуст, и модель нужно
+    загрузить заново через /upload-model/{product_id}; у существующих продуктов
+    остается прежняя модель.
+    """
+    try:
+        stats = await import_catalog_ndjson(db, request.stream())
+    except CatalogImportError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    return asdict(stats)
@@ -5,21 +5,29 @@ import shutil
 from contextlib import asynccontextmanager
 from typing import Annotated
 
-from fastapi import FastAPI, Depends, HTTPException, status, File, UploadFile
+from fastapi import FastAPI, BackgroundTasks, Depends, HTTPException, status, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # --- Импорты из вашего проекта ---
 from core.config import settings
-from database import engine, create_tables
+from core import invalidation
+from database import engine, station_engine, create_tables
 from dependencies import get_db
 
 # --- ПРАВИЛЬНЫЕ ИМПОРТЫ РОУТЕРОВ И ЗАВИСИМОСТЕЙ ---
 # Мы импортируем объект 'router' из наших модулей-роутеров
 from auth.auth_main import app as auth_api_router
 from graphic.graphic_main import router as graphql_api_router # Предполагается, что вы переименовали crud в router
-from graphic import graphic_crud
+from graphic import graphic_crud, graphic_thumbnail_index, graphic_thumbnails
+from graphic.graphic_batching import MAX_BATCH_HEADER
+from graphic.graphic_transfer import router as catalog_api_router
+from station.station_main import router as station_api_router
+from station.station_snapshot import plan_snapshot
+from telemetry.telemetry_main import router as telemetry_api_router
+from telemetry.telemetry_ingest import step_event_buffer
 from auth.auth_dependencies import require_admin_user
 from auth import auth_models, auth_permissions
  
@@ -29,12 +37,28 @@ from auth import auth_models, auth_permissions
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Lifespan: Startup...")
-    await create_tables()
+    # Снимок планов читается первым: станции можно обслуживать еще до ответа БД
+    snapshot_loaded = plan_snapshot.load()
+    try:
+        await create_tables()
+    except (OSError, DBAPIError) as e:
+        if not snapshot_loaded:
+            raise
+        print(f"Lifespan: database unavailable ({e!r}), serving plans from snapshot")
     os.makedirs(settings.MODELS_DIR, exist_ok=True)
+    # Какие превью уже нарисованы: один проход по каталогу вместо stat на каждый продукт
+    graphic_thumbnail_index.scan()
+    await invalidation.bus.start()
+    await step_event_buffer.start()
+    await plan_snapshot.start()
     print("Lifespan: Startup complete.")
     yield
     print("Lifespan: Shutdown...")
+    await plan_snapshot.stop()
+    await step_event_buffer.stop()
+    await invalidation.bus.stop()
     await engine.dispose()
+    await station_engine.dispose()
     print("Lifespan: Shutdown complete.")
 
 # --- FastAPI ПРИЛОЖЕНИЕ ---
@@ -47,6 +71,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Браузер отдает JS только перечисленные заголовки ответа (лимит пакета GraphQL)
+    expose_headers=[MAX_BATCH_HEADER],
 )
 
 # --- ПОДКЛЮЧЕНИЕ РОУТЕРОВ ---
@@ -56,6 +82,15 @@ app.include_router(auth_api_router, prefix="/auth", tags=["Authentication"])
 # 2. Подключаем GraphQL API (/graphql)
 app.include_router(graphql_api_router, prefix="/graphql", tags=["GraphQL"])
 
+# 3. Подключаем REST API станций (/stations/{computer_name}/bundle)
+app.include_router(station_api_router, prefix="/stations", tags=["Stations"])
+
+# 4. Подключаем прием телеметрии шагов от станций (/telemetry/step-events)
+app.include_router(telemetry_api_router, prefix="/telemetry", tags=["Telemetry"])
+
+# 5. Подключаем потоковый экспорт/импорт каталога (/catalog/export, /catalog/import)
+app.include_router(catalog_api_router, prefix="/catalog", tags=["Catalog"])
+
 # --- ОТДЕЛЬНЫЕ ЭНДПОИНТЫ ---
 # Этот эндпоинт защищен и требует прав админа
 @app.post("/upload-model/{product_id}", tags=["Editor Actions"])
@@ -63,6 +98,7 @@ async def upload_model(
     product_id: int,
     user: Annotated[auth_models.User, Depends(auth_permissions.IsAdmin)],
     db: Annotated[AsyncSession, Depends(get_db)],
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
 ):
     # Сохраняем файл
@@ -83,6 +119,9 @@ async def upload_model(
             
         with open(file_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
+        # Превью для панели администратора рисуется на CPU уже после ответа
+        # (фоновая задача в пуле потоков) и не задерживает загрузку модели
+        background_tasks.add_task(graphic_thumbnails.render_after_upload, file_path, product_id)
     # Формируем относительный путь для БД (без static/)
         relative_path_for_db = os.path.join("models", f"product_{product_id}.glb").replace('\\', '/')
    
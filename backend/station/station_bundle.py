@@ -0,0 +1,243 @@
+# Файл: backend/station/station_bundle.py
+
+import asyncio
+import hashlib
+import json
+import os
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import msgpack
+
+from core import invalidation
+from core.config import settings
+from core.invalidation import InvalidationEvent, InvalidationKind
+from graphic import graphic_codec
+from graphic import graphic_schemas as schemas
+from .station_snapshot import resolve_station_plan
+
+# Размер блока при чтении GLB-файла (хеширование и потоковая отдача)
+MODEL_CHUNK_SIZE = 64 * 1024
+
+# Магическое число и тип JSON-чанка в формате GLB (glTF 2.0 binary)
+GLB_MAGIC = 0x46546C67
+GLB_CHUNK_JSON = 0x4E4F534A
+
+
+@dataclass
+class ModelInfo:
+    """Сведения о GLB-файле модели, вычисляемые один раз на версию файла."""
+    sha256: str
+    size: int
+    node_names: List[str]
+
+
+@dataclass
+class StationBundle:
+    """Готовый (предвычисленный) ответ для станции."""
+    product_id: int
+    body: bytes
+    etag: str
+    model_file: Optional[str] = None
+    model_size: int = 0
+    created_at: float = field(default_factory=time.monotonic)
+    # Для MessagePack-варианта ответа (собирается лениво, по первому запросу)
+    computer_name: str = ""
+    plan: Optional[schemas.AssemblyPlan] = None
+    model: Optional[dict] = None
+    plan_generation: int = 0
+    _compact_body: Optional[bytes] = field(default=None, repr=False)
+
+    @property
+    def compact_etag(self) -> str:
+        # У разных представлений одного ресурса должны быть разные ETag
+        return self.etag[:-1] + '-mp"'
+
+    def compact_body(self) -> bytes:
+        """
+        Тот же бандл в MessagePack: {computerName, plan, model}, где plan -
+        компактный план из graphic_codec. Байты плана берутся из общего кеша,
+        поэтому станции одного продукта не кодируют его заново.
+        """
+        if self._compact_body is None:
+            plan_body = graphic_codec.encoded_plan_cache.get(self.plan, self.plan_generation)
+            # Карта из 3 пар собирается вручную, чтобы вставить готовые байты плана как есть
+            self._compact_body = b"".join((
+                b"\x83",
+                msgpack.packb("computerName"), msgpack.packb(self.computer_name),
+                msgpack.packb("plan"), plan_body,
+                msgpack.packb("model"), msgpack.packb(self.model, use_bin_type=True),
+            ))
+        return self._compact_body
+
+
+# --- КЕШИ ---
+# Ключ кеша моделей - (путь, mtime_ns, размер): перезапись файла дает новый ключ.
+_model_info_cache: Dict[Tuple[str, int, int], ModelInfo] = {}
+# Бандлы по имени станции (в нижнем регистре, т.к. поиск станции идет через ilike)
+_bundle_cache: Dict[str, StationBundle] = {}
+# Фиксированный набор блокировок (по хешу имени): эндпоинт открыт, и словарь
+# блокировок по произвольным именам рос бы без ограничений
+BUILD_LOCK_STRIPES = 64
+_build_locks: List[asyncio.Lock] = [asyncio.Lock() for _ in range(BUILD_LOCK_STRIPES)]
+# Растет при каждой инвалидации: бандл, собранный до нее, в кеш не попадет
+_generation = 0
+
+
+def model_file_from_path(model_path: Optional[str]) -> Optional[str]:
+    """Превращает URL-путь из Product.model_path в путь к файлу на диске."""
+    if not model_path:
+        return None
+    return os.path.join(settings.MODELS_DIR, os.path.basename(model_path))
+
+
+def _read_glb_node_names(file_path: str) -> List[str]:
+    """Читает только JSON-чанк GLB и возвращает имена узлов сцены."""
+    with open(file_path, "rb") as f:
+        header = f.read(20)
+        if len(header) < 20:
+            return []
+        magic, _version, _length, chunk_length, chunk_type = struct.unpack("<5I", header)
+        if magic != GLB_MAGIC or chunk_type != GLB_CHUNK_JSON:
+            return []
+        gltf = json.loads(f.read(chunk_length))
+    return [node["name"] for node in gltf.get("nodes", []) if node.get("name")]
+
+
+def _compute_model_info(file_path: str) -> ModelInfo:
+    digest = hashlib.sha256()
+    size = 0
+    with open(file_path, "rb") as f:
+        while chunk := f.read(MODEL_CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+    try:
+        node_names = _read_glb_node_names(file_path)
+    except (ValueError, struct.error):
+        node_names = []
+    return ModelInfo(sha256=digest.hexdigest(), size=size, node_names=node_names)
+
+
+async def get_model_info(file_path: str) -> Optional[ModelInfo]:
+    """Возвращает хеш, размер и список узлов модели (с кешированием по mtime)."""
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    key = (file_path, stat.st_mtime_ns, stat.st_size)
+    info = _model_info_cache.get(key)
+    if info is None:
+        # Хеширование большого файла не должно блокировать event loop
+        info = await asyncio.to_thread(_compute_model_info, file_path)
+        # Старые версии этого же файла больше не нужны
+        for old_key in [k for k in _model_info_cache if k[0] == file_path]:
+            del _model_info_cache[old_key]
+        _model_info_cache[key] = info
+    return info
+
+
+async def build_station_bundle(computer_name: str) -> Optional[StationBundle]:
+    """
+    Собирает бандл станции: план сборки, манифест модели и URL/хеш модели.
+    Возвращает None, если станция или план не найдены.
+    """
+    # План берется из БД, а если она не отвечает - из снимка на диске
+    plan_generation = graphic_codec.current_generation()
+    plan = await resolve_station_plan(computer_name)
+    if not plan:
+        return None
+
+    model_file = model_file_from_path(plan.product.model_path)
+    model_info = await get_model_info(model_file) if model_file else None
+
+    model: Optional[dict] = None
+    if model_info:
+        mesh_ids = [step.component.mesh_id for step in plan.steps]
+        known_nodes = set(model_info.node_names)
+        model = {
+            # Версионированный URL можно кешировать в браузере бессрочно
+            "url": f"{plan.product.model_path}?v={model_info.sha256[:16]}",
+            "sha256": model_info.sha256,
+            "size": model_info.size,
+            "manifest": {
+                "meshIds": mesh_ids,
+                "missingMeshIds": [mesh_id for mesh_id in mesh_ids if mesh_id not in known_nodes],
+                "nodeCount": len(model_info.node_names),
+            },
+        }
+
+    payload = {
+        "computerName": computer_name,
+        "plan": plan.model_dump(mode="json", by_alias=True),
+        "model": model,
+    }
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return StationBundle(
+        product_id=plan.product.id,
+        body=body,
+        etag=etag,
+        model_file=model_file if model_info else None,
+        model_size=model_info.size if model_info else 0,
+        computer_name=computer_name,
+        plan=plan,
+        model=model,
+        plan_generation=plan_generation,
+    )
+
+
+async def get_station_bundle(computer_name: str) -> Optional[StationBundle]:
+    """Возвращает бандл из кеша или собирает его (один раз на станцию одновременно)."""
+    key = computer_name.lower()
+    bundle = _bundle_cache.get(key)
+    if bundle and time.monotonic() - bundle.created_at < settings.STATION_BUNDLE_TTL_SECONDS:
+        return bundle
+
+    lock = _build_locks[hash(key) % BUILD_LOCK_STRIPES]
+    async with lock:
+        # Пока мы ждали блокировку, бандл мог собрать другой запрос
+        bundle = _bundle_cache.get(key)
+        if bundle and time.monotonic() - bundle.created_at < settings.STATION_BUNDLE_TTL_SECONDS:
+            return bundle
+        generation = _generation
+        bundle = await build_station_bundle(computer_name)
+        if bundle is None:
+            _bundle_cache.pop(key, None)
+        elif generation == _generation:
+            _bundle_cache[key] = bundle
+        return bundle
+
+
+# --- ИНВАЛИДАЦИЯ ---
+def invalidate_product(product_id: int) -> None:
+    """Сбрасывает бандлы всех станций, которые собирают данный продукт."""
+    global _generation
+    _generation += 1
+    for key in [k for k, b in _bundle_cache.items() if b.product_id == product_id]:
+        del _bundle_cache[key]
+
+
+def invalidate_station(computer_name: str) -> None:
+    global _generation
+    _generation += 1
+    _bundle_cache.pop(computer_name.lower(), None)
+
+
+def invalidate_all() -> None:
+    global _generation
+    _generation += 1
+    _bundle_cache.clear()
+
+
+async def _on_invalidation(event: InvalidationEvent) -> None:
+    if event.kind in (InvalidationKind.PRODUCT, InvalidationKind.PLAN) and event.key is not None:
+        invalidate_product(int(event.key))
+    elif event.kind == InvalidationKind.WORKSTATION and event.key is not None:
+        invalidate_station(event.key)
+    elif event.kind in (InvalidationKind.WORKSTATION, InvalidationKind.ALL):
+        invalidate_all()
+
+
+invalidation.bus.subscribe(_on_invalidation)
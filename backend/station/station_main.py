@@ -0,0 +1,76 @@
+# Файл: backend/station/station_main.py
+
+import uuid
+from typing import Annotated, AsyncIterator, Optional
+
+import anyio
+from fastapi import APIRouter, Header, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+
+from graphic import graphic_codec
+from . import station_bundle
+from .station_bundle import MODEL_CHUNK_SIZE, StationBundle
+
+router = APIRouter()
+
+
+async def _multipart_body(bundle: StationBundle, body: bytes, media_type: str, boundary: str) -> AsyncIterator[bytes]:
+    """Отдает бандл и байты модели одним multipart/mixed потоком."""
+    yield (
+        f"--{boundary}\r\n"
+        f"Content-Type: {media_type}\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    ).encode("ascii")
+    yield body
+    yield (
+        f"\r\n--{boundary}\r\n"
+        "Content-Type: model/gltf-binary\r\n"
+        f"Content-Length: {bundle.model_size}\r\n\r\n"
+    ).encode("ascii")
+    # Файл читаем блоками в отдельном потоке, чтобы не держать модель в памяти
+    async with await anyio.open_file(bundle.model_file, "rb") as f:
+        while chunk := await f.read(MODEL_CHUNK_SIZE):
+            yield chunk
+    yield f"\r\n--{boundary}--\r\n".encode("ascii")
+
+
+@router.get("/{computer_name}/bundle", tags=["Stations"])
+async def get_station_bundle(
+    computer_name: str,
+    include_model: bool = False,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    accept: Annotated[Optional[str], Header()] = None,
+):
+    """
+    Все, что нужно станции для старта, за один запрос: план сборки,
+    манифест модели и ее URL/хеш. С include_model=true ответ приходит
+    как multipart/mixed, где вторая часть - сам GLB-файл.
+    С Accept: application/x-msgpack бандл отдается в MessagePack,
+    а план в нем - в компактном виде (см. graphic_codec).
+    """
+    bundle = await station_bundle.get_station_bundle(computer_name)
+    if bundle is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No assembly plan found for computer: {computer_name}",
+        )
+
+    if graphic_codec.accepts_msgpack(accept):
+        etag, media_type = bundle.compact_etag, graphic_codec.MSGPACK_MEDIA_TYPE
+    else:
+        etag, media_type = bundle.etag, "application/json"
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    body = bundle.compact_body() if media_type == graphic_codec.MSGPACK_MEDIA_TYPE else bundle.body
+
+    if include_model and bundle.model_file:
+        boundary = uuid.uuid4().hex
+        return StreamingResponse(
+            _multipart_body(bundle, body, media_type, boundary),
+            media_type=f"multipart/mixed; boundary={boundary}",
+            headers=headers,
+        )
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,279 @@
+# Файл: backend/station/station_snapshot.py
+#
+# Снимок планов всех станций на локальном диске. Он загружается при старте
+# за миллисекунды и позволяет станциям работать, пока Postgres медленный,
+# перезапускается или недоступен (stale-while-revalidate).
+
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+from core import invalidation
+from core.config import settings
+from core.invalidation import InvalidationEvent, InvalidationKind
+from database import AsyncSessionFactory, StationSessionFactory, set_statement_timeout
+from graphic import graphic_crud as crud
+from graphic import graphic_schemas as schemas
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+# Ошибки, при которых вместо ответа БД отдаем снимок
+DB_UNAVAILABLE_ERRORS = (asyncio.TimeoutError, OSError, OperationalError, DBAPIError)
+# Пауза, чтобы пачка изменений (например, импорт) привела к одной записи файла
+REFRESH_DEBOUNCE_SECONDS = 0.2
+REFRESH_RETRY_SECONDS = 5.0
+
+
+class PlanSnapshot:
+    """
+    Хранит станции (computer_name -> product_id) и планы (product_id -> план).
+    Каждый план хранится один раз, сколько бы станций его ни собирали.
+    Планы валидируются в Pydantic-схему лениво, при первом обращении,
+    поэтому загрузка файла - это по сути один json.load.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._stations: Dict[str, int] = {}
+        self._plans_raw: Dict[int, dict] = {}
+        self._plans: Dict[int, schemas.AssemblyPlan] = {}
+        self.loaded_at: Optional[float] = None
+
+        # Что нужно перечитать из БД фоновой задачей
+        self._dirty_products: Set[int] = set()
+        self._dirty_stations = False
+        self._dirty_all = False
+        # Данные в памяти уже свежие, нужно только записать файл
+        self._write_requested = False
+        self._refresh_wakeup = asyncio.Event()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    # --- ЧТЕНИЕ ---
+    def get_plan(self, computer_name: str) -> Optional[schemas.AssemblyPlan]:
+        product_id = self._stations.get(computer_name.lower())
+        if product_id is None:
+            return None
+        plan = self._plans.get(product_id)
+        if plan is None and product_id in self._plans_raw:
+            plan = schemas.AssemblyPlan.model_validate(self._plans_raw[product_id])
+            self._plans[product_id] = plan
+        return plan
+
+    # --- ОБНОВЛЕНИЕ ИЗ ЖИВЫХ ОТВЕТОВ БД ---
+    def remember(self, computer_name: str, plan: schemas.AssemblyPlan) -> None:
+        """Запоминает свежий план станции; если он изменился - пишет файл."""
+        key = computer_name.lower()
+        product_id = plan.product.id
+        if self._stations.get(key) == product_id and self._plans.get(product_id) == plan:
+            return
+        self._stations[key] = product_id
+        self._set_plan(product_id, plan)
+        self._request_write()
+
+    def _set_plan(self, product_id: int, plan: schemas.AssemblyPlan) -> None:
+        self._plans[product_id] = plan
+        self._plans_raw[product_id] = plan.model_dump(mode="json")
+
+    # --- ФАЙЛ ---
+    def load(self) -> bool:
+        """Загружает снимок с диска. Возвращает False, если файла нет или он битый."""
+        started = time.perf_counter()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != SNAPSHOT_VERSION:
+                return False
+            self._stations = dict(data["stations"])
+            self._plans_raw = {int(product_id): plan for product_id, plan in data["plans"].items()}
+            self._plans = {}
+        except FileNotFoundError:
+            return False
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Plan snapshot %s is corrupt, ignoring it", self.path)
+            return False
+        self.loaded_at = time.time()
+        print(f"Plan snapshot: loaded {len(self._stations)} stations, {len(self._plans_raw)} plans "
+              f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+        return True
+
+    def write(self) -> None:
+        """Атомарно записывает снимок: временный файл + os.replace."""
+        self._write_data(self._snapshot_data())
+
+    def _snapshot_data(self) -> dict:
+        # Вызывается в потоке цикла событий: копии словарей не меняются, пока
+        # файл пишется в другом потоке (сами планы заменяются, а не правятся)
+        return {
+            "version": SNAPSHOT_VERSION,
+            "writtenAt": datetime.now(timezone.utc).isoformat(),
+            "stations": dict(self._stations),
+            "plans": {str(product_id): plan for product_id, plan in dict(self._plans_raw).items()},
+        }
+
+    def _write_data(self, data: dict) -> None:
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # У каждого процесса свой временный файл, поэтому воркеры не мешают друг другу
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    # --- ФОНОВОЕ ОБНОВЛЕНИЕ ---
+    async def start(self) -> None:
+        self._dirty_all = True
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+        self._refresh_wakeup.set()
+
+    async def stop(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+    def on_invalidation(self, event: InvalidationEvent) -> None:
+        def mark() -> None:
+            if event.kind in (InvalidationKind.PRODUCT, InvalidationKind.PLAN) and event.key is not None:
+                self._dirty_products.add(int(event.key))
+            elif event.kind == InvalidationKind.WORKSTATION:
+                self._dirty_stations = True
+            elif event.kind == InvalidationKind.ALL:
+                self._dirty_all = True
+        self._schedule(mark)
+
+    def _schedule(self, mark) -> None:
+        mark()
+        self._refresh_wakeup.set()
+
+    def _request_write(self) -> None:
+        self._write_requested = True
+        self._refresh_wakeup.set()
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await self._refresh_wakeup.wait()
+            await asyncio.sleep(REFRESH_DEBOUNCE_SECONDS)
+            self._refresh_wakeup.clear()
+            refresh_all, refresh_stations, products = self._take_dirty()
+            write_requested, self._write_requested = self._write_requested, False
+            try:
+                if refresh_all or refresh_stations or products:
+                    await self._refresh(refresh_all, refresh_stations, products)
+                elif not write_requested:
+                    continue
+                data = self._snapshot_data()
+                await asyncio.to_thread(self._write_data, data)
+            except DB_UNAVAILABLE_ERRORS:
+                # БД (или диск) недоступна - продолжаем отдавать старый снимок и пробуем позже
+                self._restore_dirty(refresh_all, refresh_stations, products)
+                self._write_requested |= write_requested
+                logger.warning("Plan snapshot refresh failed, retrying in %ss", REFRESH_RETRY_SECONDS)
+                await asyncio.sleep(REFRESH_RETRY_SECONDS)
+                self._refresh_wakeup.set()
+            except Exception:
+                self._restore_dirty(refresh_all, refresh_stations, products)
+                self._write_requested |= write_requested
+                logger.exception("Plan snapshot refresh failed")
+
+    def _take_dirty(self) -> Tuple[bool, bool, Set[int]]:
+        taken = (self._dirty_all, self._dirty_stations, self._dirty_products)
+        self._dirty_all, self._dirty_stations, self._dirty_products = False, False, set()
+        return taken
+
+    def _restore_dirty(self, refresh_all: bool, refresh_stations: bool, products: Set[int]) -> None:
+        # Снимок на диске не обновился - повторим все, что забрали, в следующий раз
+        self._dirty_all |= refresh_all
+        self._dirty_stations |= refresh_stations
+        self._dirty_products |= products
+
+    async def _refresh(self, refresh_all: bool, refresh_stations: bool, products: Set[int]) -> None:
+        async with AsyncSessionFactory() as db:
+            if refresh_all or refresh_stations:
+                rows = await crud.get_workstation_products_orm(db)
+                self._stations = {name.lower(): product_id for name, product_id in rows}
+            used = set(self._stations.values())
+            if refresh_all:
+                products = used
+            else:
+                # Новым станциям могли достаться продукты, которых еще нет в снимке
+                products = (products & used) | (used - self._plans_raw.keys())
+            if products:
+                plans = await crud.get_full_assembly_plans_orm(db, list(products))
+                found = {plan.product.id for plan in plans}
+                for plan in plans:
+                    self._set_plan(plan.product.id, plan)
+                for product_id in products - found:
+                    self._plans_raw.pop(product_id, None)
+                    self._plans.pop(product_id, None)
+            # Планы продуктов, которые больше никто не собирает, не храним
+            for product_id in set(self._plans_raw) - used:
+                self._plans_raw.pop(product_id, None)
+                self._plans.pop(product_id, None)
+
+plan_snapshot = PlanSnapshot(settings.PLAN_SNAPSHOT_PATH)
+invalidation.bus.subscribe(plan_snapshot.on_invalidation)
+
+
+async def _fetch_station_plan(computer_name: str) -> Optional[schemas.AssemblyPlan]:
+    # Отдельный пул станций: его не займут медленные запросы панели администратора
+    async with StationSessionFactory() as db:
+        await set_statement_timeout(db, settings.DB_QUERY_TIMEOUT_SECONDS)
+        product_id = await crud.get_product_id_by_computer_name_orm(db, computer_name=computer_name)
+        if not product_id:
+            return None
+        plan = await crud.get_full_assembly_plan_orm(db, product_id=product_id)
+    if plan is not None:
+        plan_snapshot.remember(computer_name, plan)
+    return plan
+
+
+# Запросы планов, которые сейчас выполняются (ключ - имя компьютера в нижнем
+# регистре): станция, которая опрашивает сервер, пока БД медленная, не должна
+# занимать новое соединение на каждый запрос
+_inflight_fetches: Dict[str, asyncio.Future] = {}
+
+
+def _log_background_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Station plan fetch failed: %r", task.exception())
+
+
+def _station_fetch(computer_name: str) -> asyncio.Future:
+    """Запрос плана станции к БД; одновременные вызовы получают один и тот же."""
+    key = computer_name.lower()
+    fetch = _inflight_fetches.get(key)
+    if fetch is None:
+        fetch = asyncio.ensure_future(_fetch_station_plan(computer_name))
+        _inflight_fetches[key] = fetch
+        fetch.add_done_callback(lambda _: _inflight_fetches.pop(key, None))
+        fetch.add_done_callback(_log_background_failure)
+    return fetch
+
+
+async def resolve_station_plan(computer_name: str) -> Optional[schemas.AssemblyPlan]:
+    """
+    План станции по имени компьютера. Сначала спрашиваем БД; если ответа нет
+    за PLAN_SNAPSHOT_DB_TIMEOUT_SECONDS или БД недоступна, отдаем план из
+    снимка, а запрос к БД продолжает работать в фоне и обновит снимок.
+    Пока запрос станции к БД не завершился, повторные вызовы ждут его же.
+    """
+    cached = plan_snapshot.get_plan(computer_name)
+    fetch = _station_fetch(computer_name)
+    if cached is None:
+        # Отступать некуда - ждем БД сколько потребуется. shield: запрос общий,
+        # отмена одного вызывающего не должна отменять его для остальных
+        return await asyncio.shield(fetch)
+
+    try:
+        return await asyncio.wait_for(asyncio.shield(fetch), settings.PLAN_SNAPSHOT_DB_TIMEOUT_SECONDS)
+    except DB_UNAVAILABLE_ERRORS:
+        logger.warning("Serving snapshot plan for %s: database is slow or unavailable", computer_name)
+        return cached
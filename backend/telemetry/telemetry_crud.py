@@ -0,0 +1,149 @@
+# Файл: backend/telemetry/telemetry_crud.py
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import RowMapping, bindparam, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from . import telemetry_models as models
+from . import telemetry_schemas as schemas
+from .telemetry_rollups import CycleTimeAggregate, CycleTimeSketch, RollupKey
+
+Rollup = models.CycleTimeRollup
+_KEY_COLUMNS = (Rollup.product_id, Rollup.plan_id, Rollup.step_id, Rollup.computer_name, Rollup.bucket_start)
+_KEY_NAMES = tuple(column.key for column in _KEY_COLUMNS)
+# asyncpg принимает не больше 32767 параметров в одном запросе; в INSERT по 10 на строку
+ROLLUP_WRITE_CHUNK = 3000
+
+
+def _aggregate_from_row(row: RowMapping) -> CycleTimeAggregate:
+    # Строки читаем как mapping: у Row есть метод count(), который скрыл бы колонку
+    return CycleTimeAggregate(
+        count=row["count"],
+        mean=row["mean_ms"],
+        m2=row["m2"],
+        min_ms=row["min_ms"],
+        max_ms=row["max_ms"],
+        sketch=CycleTimeSketch.from_json(row["sketch"]),
+    )
+
+
+def _row_key(row: RowMapping) -> tuple:
+    return (row["product_id"], row["plan_id"], row["step_id"], row["computer_name"], row["bucket_start"])
+
+
+# --- Функции записи (вызываются из буфера телеметрии) ---
+async def apply_cycle_time_rollups(conn: AsyncConnection, partials: Dict[RollupKey, Tuple[int, CycleTimeAggregate]]) -> None:
+    """
+    Вливает частичные агрегаты пачки в таблицу агрегатов.
+    Скетч сливается в Python, поэтому строки сначала создаются (если их нет),
+    а затем блокируются FOR UPDATE - параллельные воркеры не потеряют данные.
+    """
+    # Единый порядок ключей уменьшает шанс взаимных блокировок между воркерами
+    keys = sorted(partials)
+    for start in range(0, len(keys), ROLLUP_WRITE_CHUNK):
+        await _apply_rollup_chunk(conn, keys[start:start + ROLLUP_WRITE_CHUNK], partials)
+
+
+async def _apply_rollup_chunk(
+    conn: AsyncConnection,
+    keys: List[RollupKey],
+    partials: Dict[RollupKey, Tuple[int, CycleTimeAggregate]],
+) -> None:
+    await conn.execute(
+        insert(Rollup)
+        .values([
+            {
+                **dict(zip(_KEY_NAMES, key)), "step_number": partials[key][0],
+                "count": 0, "mean_ms": 0.0, "m2": 0.0, "sketch": {},
+            }
+            for key in keys
+        ])
+        .on_conflict_do_nothing(constraint="_cycle_time_rollup_uc")
+    )
+
+    stmt = (
+        select(Rollup.__table__)
+        .where(tuple_(*_KEY_COLUMNS).in_(keys))
+        .order_by(Rollup.id)
+        .with_for_update()
+    )
+    rows = (await conn.execute(stmt)).mappings().all()
+    by_key = {_row_key(row): row for row in rows}
+
+    params = []
+    for key in keys:
+        row = by_key[key]
+        step_number, partial = partials[key]
+        merged = _aggregate_from_row(row)
+        merged.merge(partial)
+        params.append({
+            "row_id": row["id"], "new_step_number": step_number,
+            "new_count": merged.count, "new_mean": merged.mean, "new_m2": merged.m2,
+            "new_min": merged.min_ms, "new_max": merged.max_ms, "new_sketch": merged.sketch.to_json(),
+        })
+
+    await conn.execute(
+        update(Rollup)
+        .where(Rollup.id == bindparam("row_id"))
+        .values(
+            step_number=bindparam("new_step_number"),
+            count=bindparam("new_count"), mean_ms=bindparam("new_mean"), m2=bindparam("new_m2"),
+            min_ms=bindparam("new_min"), max_ms=bindparam("new_max"), sketch=bindparam("new_sketch"),
+        ),
+        params,
+    )
+
+
+# --- Функции чтения (Read) ---
+async def get_cycle_time_stats(
+    db: AsyncSession,
+    product_id: int,
+    plan_id: Optional[int] = None,
+    computer_name: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    by_workstation: bool = True,
+) -> List[schemas.CycleTimeStats]:
+    """
+    Статистика длительности шагов по агрегатам. Стоимость зависит от числа
+    корзин в диапазоне, а не от числа сырых событий.
+    """
+    stmt = select(Rollup.__table__).where(Rollup.product_id == product_id, Rollup.count > 0)
+    if plan_id is not None:
+        stmt = stmt.where(Rollup.plan_id == plan_id)
+    if computer_name is not None:
+        stmt = stmt.where(Rollup.computer_name.ilike(computer_name))
+    if since is not None:
+        stmt = stmt.where(Rollup.bucket_start >= since)
+    if until is not None:
+        stmt = stmt.where(Rollup.bucket_start < until)
+    result = await db.execute(stmt)
+
+    groups: Dict[Tuple[int, int, Optional[str]], Tuple[int, CycleTimeAggregate]] = {}
+    for row in result.mappings():
+        group_key = (row["plan_id"], row["step_id"], row["computer_name"] if by_workstation else None)
+        _, aggregate = groups.setdefault(group_key, (row["step_number"], CycleTimeAggregate()))
+        aggregate.merge(_aggregate_from_row(row))
+
+    stats = []
+    for (plan, step_id, station), (step_number, agg) in sorted(groups.items(), key=lambda g: (g[0][0], g[1][0], g[0][2] or "")):
+        stats.append(schemas.CycleTimeStats(
+            product_id=product_id,
+            plan_id=plan,
+            step_id=step_id,
+            step_number=step_number,
+            computer_name=station,
+            count=agg.count,
+            mean_ms=agg.mean,
+            stddev_ms=agg.variance ** 0.5,
+            min_ms=agg.min_ms,
+            max_ms=agg.max_ms,
+            p50_ms=agg.sketch.quantile(0.5),
+            p90_ms=agg.sketch.quantile(0.9),
+            p95_ms=agg.sketch.quantile(0.95),
+            p99_ms=agg.sketch.quantile(0.99),
+        ))
+    return stats
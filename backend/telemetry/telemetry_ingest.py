@@ -0,0 +1,216 @@
+# Файл: backend/telemetry/telemetry_ingest.py
+
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, List, Optional, Sequence, Tuple
+
+import asyncpg
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core.config import settings
+from database import engine
+from . import telemetry_crud as crud
+from . import telemetry_models as models
+from . import telemetry_schemas as schemas
+from .telemetry_rollups import aggregate_records
+
+logger = logging.getLogger(__name__)
+
+# Порядок колонок для COPY (id и received_at заполняет сама БД)
+STEP_EVENT_COLUMNS = (
+    "computer_name", "product_id", "plan_id", "step_id",
+    "step_number", "event_type", "occurred_at", "duration_ms",
+)
+StepEventRecord = Tuple[str, int, int, int, int, str, datetime, Optional[int]]
+
+
+# Ошибки, которые повторятся при каждой попытке записать те же данные
+PERMANENT_WRITE_ERRORS = (
+    asyncpg.DataError,                          # в т.ч. NumericValueOutOfRangeError
+    asyncpg.ProgramLimitExceededError,
+    asyncpg.IntegrityConstraintViolationError,
+    sa_exc.DataError,
+    sa_exc.IntegrityError,
+    OverflowError,                              # asyncpg не смог закодировать значение
+)
+
+
+class IngestionOverloaded(Exception):
+    """Буфер заполнен и не освободился за отведенное время."""
+
+
+def is_permanent_write_error(error: BaseException) -> bool:
+    """Ищет постоянную ошибку по цепочке SQLAlchemy (orig) и asyncpg (__cause__)."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, PERMANENT_WRITE_ERRORS):
+            return True
+        seen.add(id(error))
+        error = getattr(error, "orig", None) or error.__cause__
+    return False
+
+
+def to_record(event: schemas.StepEventInput) -> StepEventRecord:
+    occurred_at = event.occurred_at
+    if occurred_at.tzinfo is None:
+        # Время без часового пояса считаем UTC
+        occurred_at = occurred_at.replace(tzinfo=timezone.utc)
+    return (
+        event.computer_name, event.product_id, event.plan_id, event.step_id,
+        event.step_number, event.event_type, occurred_at, event.duration_ms,
+    )
+
+
+class StepEventBuffer:
+    """
+    Асинхронный буфер событий станций. Запросы только складывают события в
+    очередь, а одна фоновая задача пишет их пачками через COPY (вместе с
+    обновлением агрегатов длительности шагов), когда
+    набирается batch_size событий или проходит flush_interval секунд.
+    Если записи в очереди и в полете больше max_pending, новые пачки ждут
+    до enqueue_timeout и затем отклоняются (обратное давление на станции).
+
+    Временные ошибки БД повторяются, пока запись не пройдет: очередь тем
+    временем заполняется, и станции получают 503 + Retry-After. Если пачку
+    отвергают данные (например, число вне диапазона int4), она делится пополам,
+    пока плохие события не останутся по одному - они логируются и отбрасываются,
+    а остальные записываются.
+    """
+
+    def __init__(
+        self,
+        db_engine: AsyncEngine,
+        batch_size: int,
+        flush_interval: float,
+        max_pending: int,
+        enqueue_timeout: float,
+        retry_delay: float = 0.5,
+    ) -> None:
+        self._engine = db_engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.enqueue_timeout = enqueue_timeout
+        self.retry_delay = retry_delay
+        # Сколько событий отброшено: плохие данные или остановка сервера при недоступной БД
+        self.dropped = 0
+
+        self._records: Deque[StepEventRecord] = deque()
+        # Сколько событий еще не записано в БД: в очереди плюс в текущем COPY
+        self._pending = 0
+        self._cond = asyncio.Condition()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def start(self) -> None:
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Дописывает все, что осталось в очереди, и останавливает фоновую задачу."""
+        async with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._task:
+            await self._task
+            self._task = None
+
+    async def submit(self, records: Sequence[StepEventRecord]) -> None:
+        """Принимает пачку целиком или (при переполнении) не принимает вовсе."""
+        if not records:
+            return
+        if len(records) > self.max_pending:
+            raise IngestionOverloaded()
+        async with self._cond:
+            try:
+                await asyncio.wait_for(
+                    self._cond.wait_for(lambda: self._pending + len(records) <= self.max_pending),
+                    self.enqueue_timeout,
+                )
+            except asyncio.TimeoutError:
+                raise IngestionOverloaded()
+            self._records.extend(records)
+            self._pending += len(records)
+            if len(self._records) >= self.batch_size:
+                self._cond.notify_all()
+
+    async def _take_batch(self) -> List[StepEventRecord]:
+        async with self._cond:
+            try:
+                await asyncio.wait_for(
+                    self._cond.wait_for(lambda: len(self._records) >= self.batch_size or self._stopping),
+                    self.flush_interval,
+                )
+            except asyncio.TimeoutError:
+                pass
+            count = min(self.batch_size, len(self._records))
+            return [self._records.popleft() for _ in range(count)]
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._take_batch()
+            if not batch:
+                if self._stopping:
+                    return
+                continue
+            await self._write_with_retry(batch)
+            async with self._cond:
+                self._pending -= len(batch)
+                # Место освободилось - будим ожидающих в submit()
+                self._cond.notify_all()
+
+    async def _write_with_retry(self, batch: List[StepEventRecord]) -> None:
+        delay = self.retry_delay
+        while True:
+            try:
+                await self._write(batch)
+                return
+            except Exception as e:
+                if is_permanent_write_error(e):
+                    await self._isolate_bad_records(batch, e)
+                    return
+                if self._stopping:
+                    logger.exception("Dropping %d step events on shutdown", len(batch))
+                    self.dropped += len(batch)
+                    return
+                # Пока БД недоступна, очередь растет и срабатывает обратное давление
+                logger.exception("Failed to write %d step events, retrying in %ss", len(batch), delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    async def _isolate_bad_records(self, batch: List[StepEventRecord], error: Exception) -> None:
+        """Делит отвергнутую пачку пополам, пока не найдутся плохие события."""
+        if len(batch) == 1:
+            logger.error("Dropping step event rejected by the database: %r (%s)", batch[0], error)
+            self.dropped += 1
+            return
+        middle = len(batch) // 2
+        await self._write_with_retry(batch[:middle])
+        await self._write_with_retry(batch[middle:])
+
+    async def _write(self, batch: List[StepEventRecord]) -> None:
+        async with self._engine.begin() as conn:
+            # Агрегаты обновляются в той же транзакции, что и COPY сырых событий
+            await crud.apply_cycle_time_rollups(conn, aggregate_records(batch))
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                models.StepEvent.__tablename__,
+                records=batch,
+                columns=STEP_EVENT_COLUMNS,
+            )
+
+
+step_event_buffer = StepEventBuffer(
+    engine,
+    batch_size=settings.TELEMETRY_BATCH_SIZE,
+    flush_interval=settings.TELEMETRY_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.TELEMETRY_MAX_PENDING,
+    enqueue_timeout=settings.TELEMETRY_ENQUEUE_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,25 @@
+# Файл: backend/telemetry/telemetry_main.py
+
+from fastapi import APIRouter, HTTPException, status
+
+from . import telemetry_schemas as schemas
+from .telemetry_ingest import IngestionOverloaded, step_event_buffer, to_record
+
+router = APIRouter()
+
+
+@router.post("/step-events", status_code=status.HTTP_202_ACCEPTED, tags=["Telemetry"])
+async def ingest_step_events(batch: schemas.StepEventBatch) -> dict:
+    """
+    Принимает пачку событий начала/окончания шагов от станции.
+    События пишутся в БД асинхронно; 202 означает, что пачка поставлена в очередь.
+    """
+    try:
+        await step_event_buffer.submit([to_record(event) for event in batch.events])
+    except IngestionOverloaded:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Telemetry ingestion is overloaded, retry later",
+            headers={"Retry-After": "1"},
+        )
+    return {"accepted": len(batch.events)}
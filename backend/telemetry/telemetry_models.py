@@ -0,0 +1,54 @@
+from sqlalchemy import (Column, BigInteger, Integer, String, Float, DateTime, Index, UniqueConstraint)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from database import Base
+
+class StepEvent(Base):
+    __tablename__ = "step_events"
+
+    id = Column(BigInteger, primary_key=True)
+    computer_name = Column(String(255), nullable=False)
+    product_id = Column(Integer, nullable=False)
+    # Без внешних ключей: план пересоздается при сохранении, а история должна остаться
+    plan_id = Column(Integer, nullable=False)
+    step_id = Column(Integer, nullable=False)
+    step_number = Column(Integer, nullable=False)
+    event_type = Column(String(10), nullable=False) # 'start' или 'finish'
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    duration_ms = Column(Integer) # Длительность шага, только у 'finish'
+    received_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_step_events_product_occurred', 'product_id', 'occurred_at'),
+    )
+
+    def __repr__(self):
+        return f"<StepEvent(id={self.id}, computer_name='{self.computer_name}', step_id={self.step_id}, event_type='{self.event_type}')>"
+
+
+class CycleTimeRollup(Base):
+    """Агрегат длительностей шага на станции за одну временную корзину."""
+    __tablename__ = "cycle_time_rollups"
+
+    id = Column(BigInteger, primary_key=True)
+    product_id = Column(Integer, nullable=False)
+    plan_id = Column(Integer, nullable=False)
+    step_id = Column(Integer, nullable=False)
+    step_number = Column(Integer, nullable=False)
+    computer_name = Column(String(255), nullable=False)
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+
+    count = Column(BigInteger, nullable=False, default=0)
+    mean_ms = Column(Float, nullable=False, default=0.0)
+    m2 = Column(Float, nullable=False, default=0.0) # Сумма квадратов отклонений (Уэлфорд)
+    min_ms = Column(Float)
+    max_ms = Column(Float)
+    sketch = Column(JSONB, nullable=False, default=dict) # Сливаемый скетч квантилей
+
+    __table_args__ = (
+        UniqueConstraint('product_id', 'plan_id', 'step_id', 'computer_name', 'bucket_start', name='_cycle_time_rollup_uc'),
+        Index('ix_cycle_time_rollups_product_bucket', 'product_id', 'bucket_start'),
+    )
+
+    def __repr__(self):
+        return f"<CycleTimeRollup(id={self.id}, step_id={self.step_id}, computer_name='{self.computer_name}', count={self.count})>"
@@ -0,0 +1,140 @@
+# Файл: backend/telemetry/telemetry_rollups.py
+
+import math
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from core.config import settings
+
+# Относительная точность квантилей: оценка отличается от истины не более чем на 1%
+SKETCH_RELATIVE_ACCURACY = 0.01
+_GAMMA = (1 + SKETCH_RELATIVE_ACCURACY) / (1 - SKETCH_RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+# Значения меньше 1 мс считаем нулевыми (отдельный счетчик)
+_MIN_VALUE = 1.0
+
+
+class CycleTimeSketch:
+    """
+    Сливаемый скетч квантилей (логарифмические корзины, как в DDSketch).
+    Каждое значение попадает в корзину ceil(log_gamma(x)); слияние двух
+    скетчей - это сложение счетчиков, поэтому агрегаты по часам, станциям
+    и шагам объединяются без доступа к сырым событиям.
+    """
+
+    def __init__(self, bins: Optional[Dict[int, int]] = None, zero_count: int = 0) -> None:
+        self.bins: Dict[int, int] = bins or {}
+        self.zero_count = zero_count
+
+    @property
+    def count(self) -> int:
+        return self.zero_count + sum(self.bins.values())
+
+    def add(self, value: float) -> None:
+        if value < _MIN_VALUE:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / _LOG_GAMMA)
+        self.bins[index] = self.bins.get(index, 0) + 1
+
+    def merge(self, other: "CycleTimeSketch") -> None:
+        self.zero_count += other.zero_count
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+
+    def quantile(self, q: float) -> Optional[float]:
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                # Середина корзины (gamma^(i-1), gamma^i] в смысле относительной ошибки
+                return 2 * _GAMMA ** index / (_GAMMA + 1)
+        return 2 * _GAMMA ** max(self.bins) / (_GAMMA + 1)
+
+    def to_json(self) -> dict:
+        # Ключи JSON - строки
+        return {"zero": self.zero_count, "bins": {str(i): c for i, c in self.bins.items()}}
+
+    @classmethod
+    def from_json(cls, data: Optional[dict]) -> "CycleTimeSketch":
+        if not data:
+            return cls()
+        return cls({int(i): c for i, c in data.get("bins", {}).items()}, data.get("zero", 0))
+
+
+@dataclass
+class CycleTimeAggregate:
+    """Count/mean/M2 (Уэлфорд) + min/max + скетч; сливается без потери точности."""
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    min_ms: Optional[float] = None
+    max_ms: Optional[float] = None
+    sketch: CycleTimeSketch = field(default_factory=CycleTimeSketch)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min_ms = value if self.min_ms is None else min(self.min_ms, value)
+        self.max_ms = value if self.max_ms is None else max(self.max_ms, value)
+        self.sketch.add(value)
+
+    def merge(self, other: "CycleTimeAggregate") -> None:
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min_ms, self.max_ms = other.min_ms, other.max_ms
+            self.sketch.merge(other.sketch)
+            return
+        # Параллельная формула Чана для объединения дисперсий
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+        self.min_ms = min(self.min_ms, other.min_ms)
+        self.max_ms = max(self.max_ms, other.max_ms)
+        self.sketch.merge(other.sketch)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+
+# (product_id, plan_id, step_id, computer_name, bucket_start) - как _cycle_time_rollup_uc.
+# Номер шага в ключ не входит: если шаг перенумеровали, его события
+# продолжают копиться в той же строке, а номер берется последний.
+RollupKey = Tuple[int, int, int, str, datetime]
+
+
+def bucket_start(moment: datetime) -> datetime:
+    """Начало временной корзины, в которую попадает момент времени (UTC)."""
+    bucket = timedelta(minutes=settings.TELEMETRY_ROLLUP_BUCKET_MINUTES)
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return epoch + ((moment - epoch) // bucket) * bucket
+
+
+def aggregate_records(records: Iterable[tuple]) -> Dict[RollupKey, Tuple[int, CycleTimeAggregate]]:
+    """
+    Сворачивает пачку записей StepEvent в частичные агрегаты (номер шага, агрегат).
+    Учитываются только события 'finish' с длительностью шага.
+    """
+    partials: Dict[RollupKey, Tuple[int, CycleTimeAggregate]] = {}
+    for computer_name, product_id, plan_id, step_id, step_number, event_type, occurred_at, duration_ms in records:
+        if event_type != "finish" or duration_ms is None:
+            continue
+        key = (product_id, plan_id, step_id, computer_name, bucket_start(occurred_at))
+        _, aggregate = partials.get(key) or (step_number, CycleTimeAggregate())
+        aggregate.add(float(duration_ms))
+        partials[key] = (step_number, aggregate)
+    return partials
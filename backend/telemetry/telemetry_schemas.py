@@ -0,0 +1,58 @@
+# Файл: backend/telemetry/telemetry_schemas.py
+
+from datetime import datetime
+from typing import List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+from graphic.graphic_schemas import to_camel
+
+# Телеметрия, как и все остальное API, говорит на camelCase
+camel_alias_config = ConfigDict(
+    alias_generator=to_camel,
+    populate_by_name=True
+)
+
+# Сколько событий станция может прислать за один запрос
+MAX_EVENTS_PER_BATCH = 5000
+# Колонки в БД - integer (int4): большие значения отсекаем еще при валидации
+INT4_MAX = 2**31 - 1
+
+
+class StepEventInput(BaseModel):
+    computer_name: str = Field(max_length=255)
+    product_id: int = Field(ge=0, le=INT4_MAX)
+    plan_id: int = Field(ge=0, le=INT4_MAX)
+    step_id: int = Field(ge=0, le=INT4_MAX)
+    step_number: int = Field(ge=0, le=INT4_MAX)
+    event_type: Literal["start", "finish"]
+    occurred_at: datetime
+    # Станция сама знает, когда начала шаг: длительность приходит с 'finish'
+    duration_ms: Optional[int] = Field(default=None, ge=0, le=INT4_MAX)
+
+    model_config = camel_alias_config
+
+class StepEventBatch(BaseModel):
+    events: List[StepEventInput] = Field(max_length=MAX_EVENTS_PER_BATCH)
+
+    model_config = camel_alias_config
+
+
+# --- СХЕМЫ ДЛЯ ВЫХОДНЫХ ДАННЫХ ---
+class CycleTimeStats(BaseModel):
+    product_id: int
+    plan_id: int
+    step_id: int
+    step_number: int
+    # None, если статистика объединена по всем станциям
+    computer_name: Optional[str] = None
+    count: int
+    mean_ms: float
+    stddev_ms: float
+    min_ms: Optional[float] = None
+    max_ms: Optional[float] = None
+    p50_ms: Optional[float] = None
+    p90_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    p99_ms: Optional[float] = None
+
+    model_config = camel_alias_config
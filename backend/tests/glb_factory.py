@@ -0,0 +1,57 @@
+# Файл: backend/tests/glb_factory.py
+
+import json
+import struct
+from typing import List, Optional, Sequence
+
+GLB_MAGIC = 0x46546C67
+
+
+def make_glb(
+    positions: Sequence[Sequence[float]],
+    indices: Sequence[int],
+    node: Optional[dict] = None,
+    base_color: Optional[List[float]] = None,
+) -> bytes:
+    """Минимальный GLB с одним мешем (float32 позиции + uint16 индексы)."""
+    position_bytes = b"".join(struct.pack("<3f", *p) for p in positions)
+    index_bytes = struct.pack(f"<{len(indices)}H", *indices)
+    index_bytes += b"\x00" * (-len(index_bytes) % 4)
+    binary = position_bytes + index_bytes
+    gltf = {
+        "asset": {"version": "2.0"},
+        "buffers": [{"byteLength": len(binary)}],
+        "bufferViews": [
+            {"buffer": 0, "byteOffset": 0, "byteLength": len(position_bytes)},
+            {"buffer": 0, "byteOffset": len(position_bytes), "byteLength": len(indices) * 2},
+        ],
+        "accessors": [
+            {"bufferView": 0, "componentType": 5126, "count": len(positions), "type": "VEC3"},
+            {"bufferView": 1, "componentType": 5123, "count": len(indices), "type": "SCALAR"},
+        ],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0}, "indices": 1}]}],
+        "nodes": [{"mesh": 0, **(node or {})}],
+        "scenes": [{"nodes": [0]}],
+        "scene": 0,
+    }
+    if base_color is not None:
+        gltf["materials"] = [{"pbrMetallicRoughness": {"baseColorFactor": base_color}}]
+        gltf["meshes"][0]["primitives"][0]["material"] = 0
+    json_bytes = json.dumps(gltf).encode("utf-8")
+    json_bytes += b" " * (-len(json_bytes) % 4)
+    chunks = (
+        struct.pack("<2I", len(json_bytes), 0x4E4F534A) + json_bytes
+        + struct.pack("<2I", len(binary), 0x004E4942) + binary
+    )
+    return struct.pack("<3I", GLB_MAGIC, 2, 12 + len(chunks)) + chunks
+
+
+# Куб 1x1x1 с центром в начале координат
+CUBE_POSITIONS = [
+    (-0.5, -0.5, -0.5), (0.5, -0.5, -0.5), (0.5, 0.5, -0.5), (-0.5, 0.5, -0.5),
+    (-0.5, -0.5, 0.5), (0.5, -0.5, 0.5), (0.5, 0.5, 0.5), (-0.5, 0.5, 0.5),
+]
+CUBE_INDICES = [
+    0, 2, 1, 0, 3, 2,  4, 5, 6, 4, 6, 7,  0, 1, 5, 0, 5, 4,
+    3, 7, 6, 3, 6, 2,  0, 4, 7, 0, 7, 3,  1, 2, 6, 1, 6, 5,
+]
@@ -0,0 +1,149 @@
+# Файл: backend/tests/test_catalog_ndjson.py
+
+import asyncio
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from graphic import graphic_transfer
+from graphic.graphic_transfer import CatalogImporter, CatalogImportError, iter_ndjson
+
+
+def _parse(chunks):
+    async def source():
+        for chunk in chunks:
+            yield chunk
+
+    async def collect():
+        return [record async for record in iter_ndjson(source())]
+
+    return asyncio.run(collect())
+
+
+def test_records_split_across_chunks():
+    records = _parse([b'{"type": "pro', b'duct", "id": 1}\n{"type"', b': "plan", "id": 2}\n'])
+    assert records == [{"type": "product", "id": 1}, {"type": "plan", "id": 2}]
+
+
+def test_last_line_without_newline_and_blank_lines():
+    records = _parse([b'\n{"type": "header", "version": 1}\n\n', b'{"type": "step", "id": 3}'])
+    assert [r["type"] for r in records] == ["header", "step"]
+
+
+def test_invalid_json_reports_line_number():
+    with pytest.raises(CatalogImportError, match="Line 2"):
+        _parse([b'{"type": "product"}\n{oops\n'])
+
+
+def test_record_without_type_is_rejected():
+    with pytest.raises(CatalogImportError, match="'type'"):
+        _parse([b'[1, 2, 3]\n'])
+
+
+def test_overlong_line_is_rejected_with_its_number():
+    async def source():
+        yield b'{"type": "header", "version": 1}\n{"type": "product", "name": "'
+        # Строка без перевода строки, растущая кусками, как у битого файла
+        while True:
+            yield b"x" * 1000
+
+    async def collect():
+        return [record async for record in iter_ndjson(source(), max_line_bytes=10_000)]
+
+    with pytest.raises(CatalogImportError, match="Line 2: longer than 10000 bytes"):
+        asyncio.run(collect())
+
+
+def test_line_split_into_many_small_chunks():
+    line = b'{"type": "product", "id": 1, "name": "' + b"n" * 5000 + b'"}\n'
+    records = _parse([line[i:i + 7] for i in range(0, len(line), 7)])
+    assert records == [{"type": "product", "id": 1, "name": "n" * 5000}]
+
+
+class _FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+    def scalars(self):
+        return self
+
+
+class _FakeSession:
+    """Запоминает параметры операторов вместо обращения к БД; SELECT ничего не находит."""
+
+    def __init__(self):
+        self.statements = []
+        self.executemany_params = []
+        self.connection_options = None
+
+    async def execute(self, stmt, params=None):
+        self.statements.append(stmt.compile(dialect=postgresql.asyncpg.dialect()).params)
+        self.executemany_params.extend(params or [])
+        return _FakeResult(list(range(1, len(params or []) + 1)))
+
+    async def commit(self):
+        pass
+
+    async def connection(self, execution_options=None):
+        self.connection_options = execution_options
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def test_duplicate_conflict_keys_in_a_batch_keep_the_last_record():
+    db = _FakeSession()
+    importer = CatalogImporter(db)
+    importer._plan_ids = {1: 10}
+    importer._component_ids = {5: 50, 6: 60}
+    importer._product_ids = {1: 100}
+
+    async def run():
+        for step_id, component_id in ((1, 5), (2, 6)):
+            await importer.add({"type": "step", "id": step_id, "plan_id": 1, "component_id": component_id,
+                                "step_number": 1, "action_type": "install"})
+        for description in ("old", "new"):
+            await importer.add({"type": "workstation", "id": 1, "computer_name": "PC-1", "product_id": 1,
+                                "description": description})
+        await importer.flush()
+
+    asyncio.run(run())
+    # Между шагами и станциями - SELECT уже сохраненных имен станций
+    steps, _, workstations = db.statements
+    assert [steps[name] for name in steps if name.startswith("component_id")] == [60]
+    assert [workstations[name] for name in workstations if name.startswith("description")] == ["new"]
+
+
+def test_export_reads_one_read_only_snapshot(monkeypatch):
+    db = _FakeSession()
+    monkeypatch.setattr(graphic_transfer, "AsyncSessionFactory", lambda: db)
+
+    async def fake_export(session):
+        assert session.connection_options == {"isolation_level": "REPEATABLE READ", "postgresql_readonly": True}
+        yield b"{}\n"
+
+    monkeypatch.setattr(graphic_transfer, "export_catalog_ndjson", fake_export)
+
+    async def collect():
+        return [chunk async for chunk in graphic_transfer._export_stream()]
+
+    assert asyncio.run(collect()) == [b"{}\n"]
+
+
+def test_import_does_not_touch_model_path():
+    db = _FakeSession()
+    importer = CatalogImporter(db)
+
+    async def run():
+        await importer.add({"type": "product", "id": 7, "name": "Pump", "model_path": "/static/models/product_7.glb"})
+        await importer.flush()
+
+    asyncio.run(run())
+    assert db.executemany_params == [{"name": "Pump", "description": None}]
+    assert importer._product_ids == {7: 1}
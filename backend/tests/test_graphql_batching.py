@@ -0,0 +1,72 @@
+from typing import List
+
+import strawberry
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+
+from core.config import settings
+from graphic.graphic_batching import MAX_BATCH_HEADER, SKIPPED_AFTER_ERROR, BatchingGraphQLRouter
+
+executed: List[int] = []
+
+
+@strawberry.type
+class Query:
+    @strawberry.field
+    def ping(self) -> str:
+        return "pong"
+
+
+@strawberry.type
+class Mutation:
+    @strawberry.mutation
+    def step(self, n: int) -> int:
+        executed.append(n)
+        if n < 0:
+            raise ValueError("bad step")
+        return n
+
+
+async def get_context(request: Request, response: Response):
+    return {"request": request, "response": response}
+
+
+def _client() -> TestClient:
+    executed.clear()
+    app = FastAPI()
+    schema = strawberry.Schema(query=Query, mutation=Mutation)
+    app.include_router(BatchingGraphQLRouter(schema, context_getter=get_context), prefix="/graphql")
+    return TestClient(app)
+
+
+def _step(n: int) -> dict:
+    return {"query": "mutation($n: Int!) { step(n: $n) }", "variables": {"n": n}}
+
+
+def test_batch_response_reports_the_server_limit():
+    response = _client().post("/graphql", json=[{"query": "{ ping }"}, _step(1)])
+
+    assert response.status_code == 200
+    assert response.json() == [{"data": {"ping": "pong"}}, {"data": {"step": 1}}]
+    assert response.headers[MAX_BATCH_HEADER] == str(settings.GRAPHQL_MAX_BATCH_OPERATIONS)
+
+
+def test_oversized_batch_is_rejected_with_the_limit():
+    operations = [{"query": "{ ping }"}] * (settings.GRAPHQL_MAX_BATCH_OPERATIONS + 1)
+
+    response = _client().post("/graphql", json=operations)
+
+    assert response.status_code == 413
+    assert response.headers[MAX_BATCH_HEADER] == str(settings.GRAPHQL_MAX_BATCH_OPERATIONS)
+
+
+def test_mutations_after_a_failed_one_are_skipped():
+    response = _client().post("/graphql", json=[_step(1), _step(-1), _step(2), {"query": "{ ping }"}])
+
+    results = response.json()
+    assert executed == [1, -1]
+    assert results[0] == {"data": {"step": 1}}
+    assert results[1]["errors"][0]["message"] == "bad step"
+    assert results[2] == {"data": None, "errors": [{"message": SKIPPED_AFTER_ERROR}]}
+    # Запросы ничего не меняют и выполняются как обычно
+    assert results[3] == {"data": {"ping": "pong"}}
@@ -0,0 +1,190 @@
+import asyncio
+import json
+from typing import List
+
+import strawberry
+from fastapi import FastAPI, Request, Response
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from database import STATEMENT_TIMEOUT_KEY
+from graphic.graphic_batching import BatchingGraphQLRouter
+from graphic.graphic_limits import MUTATION_STARTED, OperationTimeoutExtension
+
+
+class _FakeSession:
+    """Сессия внутри транзакции: запоминает выполненные операторы."""
+
+    def __init__(self):
+        self.info = {}
+        self.statements: List[str] = []
+
+    def in_transaction(self) -> bool:
+        return True
+
+    async def execute(self, statement):
+        self.statements.append(str(statement))
+
+
+class _Resolvers:
+    started: asyncio.Event
+    cancelled: bool
+    finished: bool
+
+    @classmethod
+    def reset(cls) -> None:
+        cls.started, cls.cancelled, cls.finished = asyncio.Event(), False, False
+
+    @classmethod
+    async def work(cls, seconds: float) -> str:
+        cls.started.set()
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            cls.cancelled = True
+            raise
+        cls.finished = True
+        return "done"
+
+
+@strawberry.type
+class Query:
+    @strawberry.field
+    async def slow(self, seconds: float) -> str:
+        return await _Resolvers.work(seconds)
+
+
+@strawberry.type
+class Mutation:
+    @strawberry.mutation
+    async def slow_save(self, seconds: float) -> str:
+        return await _Resolvers.work(seconds)
+
+
+schema = strawberry.Schema(query=Query, mutation=Mutation, extensions=[OperationTimeoutExtension])
+
+
+async def get_context(request: Request, response: Response):
+    return {"request": request, "response": response, "db": _FakeSession()}
+
+
+app = FastAPI()
+app.include_router(BatchingGraphQLRouter(schema, context_getter=get_context), prefix="/graphql")
+
+
+def _scope(method: str, body: bytes = b"", query_string: bytes = b"") -> dict:
+    return {
+        "type": "http", "http_version": "1.1", "method": method, "scheme": "http",
+        "path": "/graphql", "raw_path": b"/graphql", "root_path": "", "query_string": query_string,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+
+
+async def _call(scope: dict, body: bytes, disconnect: asyncio.Event):
+    """Выполняет запрос через ASGI; клиент отключается, когда выставлен disconnect."""
+    sent_body = False
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    status = next(m["status"] for m in messages if m["type"] == "http.response.start")
+    content = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+    return status, content
+
+
+async def _post_and_disconnect(query: str):
+    _Resolvers.reset()
+    body = json.dumps({"query": query}).encode()
+    disconnect = asyncio.Event()
+    call = asyncio.ensure_future(_call(_scope("POST", body), body, disconnect))
+    await _Resolvers.started.wait()
+    disconnect.set()
+    return await call
+
+
+def test_query_and_mutation_get_their_own_timeouts(monkeypatch):
+    monkeypatch.setattr(settings, "DB_QUERY_TIMEOUT_SECONDS", 1.5)
+    monkeypatch.setattr(settings, "DB_MUTATION_TIMEOUT_SECONDS", 4.0)
+
+    async def run(query: str):
+        _Resolvers.reset()
+        db, request = _FakeSession(), Request(_scope("POST"))
+        result = await schema.execute(query, context_value={"db": db, "request": request})
+        assert result.errors is None
+        return db, request
+
+    query_db, query_request = asyncio.run(run("{ slow(seconds: 0) }"))
+    mutation_db, mutation_request = asyncio.run(run("mutation { slowSave(seconds: 0) }"))
+
+    assert query_db.info[STATEMENT_TIMEOUT_KEY] == 1500
+    assert query_db.statements == ["SET LOCAL statement_timeout = 1500"]
+    assert not getattr(query_request.state, MUTATION_STARTED, False)
+    assert mutation_db.info[STATEMENT_TIMEOUT_KEY] == 4000
+    assert mutation_db.statements == ["SET LOCAL statement_timeout = 4000"]
+    assert getattr(mutation_request.state, MUTATION_STARTED) is True
+
+
+def test_statement_timeout_is_reapplied_after_commit():
+    engine = create_engine("sqlite://")
+    applied = []
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        # SQLite не знает SET LOCAL: запоминаем оператор и выполняем пустышку
+        if statement.startswith("SET LOCAL"):
+            applied.append(statement)
+            return "SELECT 1", parameters
+        return statement, parameters
+
+    with Session(engine) as session:
+        session.info[STATEMENT_TIMEOUT_KEY] = 2500
+        session.execute(text("SELECT 1"))
+        session.commit()
+        # Коммит посреди запроса: новая транзакция получает тот же бюджет
+        session.execute(text("SELECT 1"))
+
+    assert applied == ["SET LOCAL statement_timeout = 2500"] * 2
+
+
+def test_disconnect_cancels_a_query():
+    status, _ = asyncio.run(_post_and_disconnect("{ slow(seconds: 5) }"))
+
+    assert status == 499
+    assert _Resolvers.cancelled
+    assert not _Resolvers.finished
+
+
+def test_disconnect_does_not_cancel_a_started_mutation():
+    status, content = asyncio.run(_post_and_disconnect("mutation { slowSave(seconds: 0.05) }"))
+
+    assert status == 200
+    assert json.loads(content) == {"data": {"slowSave": "done"}}
+    assert _Resolvers.finished
+    assert not _Resolvers.cancelled
+
+
+def test_get_requests_are_not_watched_for_disconnect():
+    async def run():
+        _Resolvers.reset()
+        disconnect = asyncio.Event()
+        disconnect.set()
+        scope = _scope("GET", query_string=b"query=%7B%20slow(seconds%3A%200.05)%20%7D")
+        return await _call(scope, b"", disconnect)
+
+    status, content = asyncio.run(run())
+
+    assert status == 200
+    assert json.loads(content) == {"data": {"slow": "done"}}
@@ -0,0 +1,103 @@
+# Файл: backend/tests/test_invalidation.py
+
+import asyncio
+
+import asyncpg
+
+from core.invalidation import InMemoryBus, InvalidationEvent, InvalidationKind, PostgresNotifyBus
+
+
+def test_event_json_round_trip():
+    event = InvalidationEvent(InvalidationKind.PRODUCT, "42", origin="worker-1")
+    assert InvalidationEvent.from_json(event.to_json()) == event
+
+
+def test_in_memory_bus_delivers_to_sync_and_async_handlers():
+    bus = InMemoryBus()
+    received = []
+
+    def sync_handler(event):
+        received.append(("sync", event.kind, event.key))
+
+    async def async_handler(event):
+        await asyncio.sleep(0)
+        received.append(("async", event.kind, event.key))
+
+    bus.subscribe(sync_handler)
+    bus.subscribe(async_handler)
+    asyncio.run(bus.publish(InvalidationEvent(InvalidationKind.PLAN, "7")))
+
+    assert received == [("sync", InvalidationKind.PLAN, "7"), ("async", InvalidationKind.PLAN, "7")]
+
+
+def test_failing_handler_does_not_break_publish_or_other_handlers():
+    bus = InMemoryBus()
+    received = []
+
+    def broken(event):
+        raise RuntimeError("boom")
+
+    bus.subscribe(broken)
+    bus.subscribe(lambda event: received.append(event.kind))
+    asyncio.run(bus.publish(InvalidationEvent(InvalidationKind.ALL)))
+
+    assert received == [InvalidationKind.ALL]
+
+
+class _FakeConnection:
+    """Ведет себя как asyncpg: параллельная команда на одном соединении - InterfaceError."""
+
+    def __init__(self, fail_with=None):
+        self.busy = False
+        self.sent = []
+        self.fail_with = fail_with
+
+    def is_closed(self):
+        return False
+
+    async def execute(self, query, channel, payload):
+        if self.fail_with:
+            raise self.fail_with
+        if self.busy:
+            raise asyncpg.InterfaceError("cannot perform operation: another operation is in progress")
+        self.busy = True
+        await asyncio.sleep(0.001)
+        self.sent.append(InvalidationEvent.from_json(payload))
+        self.busy = False
+
+
+def test_concurrent_publishes_are_serialized():
+    bus = PostgresNotifyBus("postgresql://unused")
+    bus._conn = _FakeConnection()
+
+    async def publish_many():
+        await asyncio.gather(*(bus.publish(InvalidationEvent(InvalidationKind.PRODUCT, str(n))) for n in range(20)))
+
+    asyncio.run(publish_many())
+    assert sorted(int(e.key) for e in bus._conn.sent) == list(range(20))
+
+
+def test_broadcast_failure_does_not_reach_publisher():
+    bus = PostgresNotifyBus("postgresql://unused")
+    bus._conn = _FakeConnection(fail_with=asyncpg.InterfaceError("connection is closed"))
+    received = []
+    bus.subscribe(lambda event: received.append(event.kind))
+
+    asyncio.run(bus.publish(InvalidationEvent(InvalidationKind.PLAN, "1")))
+    assert received == [InvalidationKind.PLAN]
+
+
+def test_reconnect_broadcasts_all_to_other_workers(monkeypatch):
+    bus = PostgresNotifyBus("postgresql://unused")
+    connection = _FakeConnection()
+
+    async def connect():
+        bus._conn = connection
+
+    monkeypatch.setattr(bus, "_connect", connect)
+    received = []
+    bus.subscribe(lambda event: received.append(event.kind))
+
+    asyncio.run(bus._reconnect())
+    assert received == [InvalidationKind.ALL]
+    assert [e.kind for e in connection.sent] == [InvalidationKind.ALL]
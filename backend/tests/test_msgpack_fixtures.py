@@ -0,0 +1,96 @@
+# Файл: backend/tests/test_msgpack_fixtures.py
+#
+# Эталонные MessagePack-байты для тестов декодера фронтенда
+# (frontend/tests/msgpack.test.ts). Байты кодирует тот же msgpack, что и
+# сервер, поэтому тест здесь проверяет, что файл не разошелся с сервером.
+# Пересоздать файл: UPDATE_MSGPACK_FIXTURES=1 python -m pytest tests/test_msgpack_fixtures.py
+
+import json
+import os
+from pathlib import Path
+
+import msgpack
+
+from graphic import graphic_codec
+from graphic import graphic_schemas as schemas
+
+FIXTURES_PATH = Path(__file__).resolve().parents[2] / "frontend" / "tests" / "fixtures" / "msgpack_cases.json"
+
+
+def _plan() -> schemas.AssemblyPlan:
+    components = [{"id": 100 + i, "name": f"Деталь {i}", "meshId": f"Mesh_{i}"} for i in range(3)]
+    return schemas.AssemblyPlan.model_validate({
+        "id": 10,
+        "name": "План сборки",
+        "product": {"id": 7, "name": "Изделие", "description": None, "modelPath": "/static/models/7.glb"},
+        "steps": [
+            {"id": 1000 + n, "stepNumber": n + 1, "actionType": "install", "component": components[n % 3]}
+            for n in range(20)
+        ],
+    })
+
+
+def _cases():
+    """(название, закодированные байты, ожидаемое значение после декодирования)."""
+    values = {
+        "positive fixint": [0, 127],
+        "negative fixint": [-1, -32],
+        "uint8": 200,
+        "uint16": 60000,
+        "uint32": 4_000_000_000,
+        "uint64 (safe integer)": 2 ** 53 - 1,
+        "int8": -100,
+        "int16": -30000,
+        "int32": -2_000_000_000,
+        "int64 (safe integer)": -(2 ** 40),
+        "float64": 3.25,
+        "nil, true, false": [None, True, False],
+        "fixstr": ["", "Деталь"],
+        "str8": "x" * 40,
+        "str16": "ы" * 300,
+        "bin8": b"\x00\x01\xff",
+        "bin16": bytes(range(256)) * 2,
+        "fixarray": [1, "a", None],
+        "array16": list(range(20)),
+        "fixmap": {"a": 1, "b": [True]},
+        "map16": {f"key{i}": i for i in range(20)},
+        "integer map keys": {1: "x", 2: "y"},
+    }
+    for name, value in values.items():
+        yield name, msgpack.packb(value, use_bin_type=True), value
+    yield "float32", msgpack.packb(1.5, use_single_float=True), 1.5
+    encoded_plan = graphic_codec.encode_plan(_plan())
+    yield "compact assembly plan", encoded_plan, msgpack.unpackb(encoded_plan, raw=False)
+
+
+def _jsonable(value):
+    # В JSON нет байтов и нечисловых ключей: так же их нормализует тест фронтенда
+    if isinstance(value, bytes):
+        return {"$bin": value.hex()}
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+def _fixture() -> list:
+    return [{"name": name, "hex": encoded.hex(), "value": _jsonable(value)} for name, encoded, value in _cases()]
+
+
+def test_frontend_msgpack_fixtures_match_the_server_encoder():
+    expected = _fixture()
+    if os.environ.get("UPDATE_MSGPACK_FIXTURES"):
+        FIXTURES_PATH.parent.mkdir(parents=True, exist_ok=True)
+        # По случаю на строку: так дифф файла показывает, какой случай изменился
+        lines = ",\n".join(json.dumps(case, ensure_ascii=False) for case in expected)
+        FIXTURES_PATH.write_text(f"[\n{lines}\n]\n", encoding="utf-8")
+    stored = json.loads(FIXTURES_PATH.read_text(encoding="utf-8"))
+    assert stored == expected
+
+
+def test_fixtures_cover_every_type_the_server_sends():
+    first_bytes = {bytes.fromhex(case["hex"])[0] for case in _fixture()}
+    # str8/16, bin8/16, float32/64, uint8..64, int8..64, array16, map16
+    for marker in (0xd9, 0xda, 0xc4, 0xc5, 0xca, 0xcb, 0xcc, 0xcd, 0xce, 0xcf, 0xd0, 0xd1, 0xd2, 0xd3, 0xdc, 0xde):
+        assert marker in first_bytes, hex(marker)
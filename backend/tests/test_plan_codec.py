@@ -0,0 +1,63 @@
+# Файл: backend/tests/test_plan_codec.py
+
+import json
+
+import msgpack
+
+from core.invalidation import InvalidationEvent, InvalidationKind
+from graphic import graphic_codec
+from graphic import graphic_schemas as schemas
+
+
+def _plan(product_id: int = 1, steps: int = 6) -> schemas.AssemblyPlan:
+    components = [{"id": 100 + i, "name": f"Part {i}", "meshId": f"Mesh_{i}"} for i in range(2)]
+    return schemas.AssemblyPlan.model_validate({
+        "id": 10,
+        "name": "Plan",
+        "product": {"id": product_id, "name": "Product", "description": None, "modelPath": None},
+        "steps": [
+            {"id": 1000 + n, "stepNumber": n + 1, "actionType": "install", "component": components[n % 2]}
+            for n in range(steps)
+        ],
+    })
+
+
+def test_compact_plan_round_trips_to_json_representation():
+    plan = _plan()
+    expected = json.loads(json.dumps(plan.model_dump(mode="json", by_alias=True)))
+    assert graphic_codec.decode_plan(graphic_codec.encode_plan(plan)) == expected
+
+
+def test_components_are_deduplicated_into_index_table():
+    data = msgpack.unpackb(graphic_codec.encode_plan(_plan(steps=6)))
+    assert len(data["components"]) == 2
+    assert [row[3] for row in data["steps"]] == [0, 1, 0, 1, 0, 1]
+
+
+def test_accepts_msgpack():
+    assert graphic_codec.accepts_msgpack("application/x-msgpack, application/json;q=0.5")
+    assert graphic_codec.accepts_msgpack("application/vnd.msgpack")
+    assert not graphic_codec.accepts_msgpack("application/msgpack;q=0")
+    assert not graphic_codec.accepts_msgpack("*/*")
+    assert not graphic_codec.accepts_msgpack(None)
+
+
+def test_encoded_plan_cache_reuses_bytes_until_product_changes():
+    cache = graphic_codec.EncodedPlanCache()
+    plan = _plan(product_id=501)
+    generation = graphic_codec.current_generation()
+    first = cache.get(plan, generation)
+    assert cache.get(plan, generation) is first
+
+    graphic_codec._on_invalidation(InvalidationEvent(InvalidationKind.PRODUCT, "501"))
+    changed = _plan(product_id=501, steps=3)
+    assert graphic_codec.decode_plan(cache.get(changed, graphic_codec.current_generation()))["steps"][-1]["stepNumber"] == 3
+
+
+def test_plan_changed_during_read_is_not_cached():
+    cache = graphic_codec.EncodedPlanCache()
+    plan = _plan(product_id=502)
+    read_at = graphic_codec.current_generation()
+    graphic_codec._on_invalidation(InvalidationEvent(InvalidationKind.PRODUCT, "502"))
+    cache.get(plan, read_at)
+    assert not cache._entries
@@ -0,0 +1,137 @@
+# Файл: backend/tests/test_plan_snapshot.py
+
+import asyncio
+import json
+
+from graphic import graphic_schemas as schemas
+from station import station_snapshot
+from station.station_snapshot import PlanSnapshot
+
+
+def _plan(product_id: int) -> dict:
+    return {"id": product_id, "name": f"Plan {product_id}", "steps": [],
+            "product": {"id": product_id, "name": f"Product {product_id}", "description": None, "modelPath": None}}
+
+
+def test_snapshot_write_during_mutation(tmp_path):
+    snapshot = PlanSnapshot(str(tmp_path / "snapshot.json"))
+    snapshot._stations = {f"pc-{n}": n for n in range(2000)}
+    snapshot._plans_raw = {n: _plan(n) for n in range(2000)}
+
+    async def run():
+        data = snapshot._snapshot_data()
+        write = asyncio.ensure_future(asyncio.to_thread(snapshot._write_data, data))
+        # Пока файл пишется в другом потоке, цикл событий меняет словари снимка
+        n = 2000
+        while not write.done():
+            snapshot._stations[f"pc-{n}"] = n
+            snapshot._plans_raw[n] = _plan(n)
+            snapshot._plans_raw.pop(n - 2000, None)
+            n += 1
+            await asyncio.sleep(0)
+        await write
+
+    asyncio.run(run())
+    with open(snapshot.path, encoding="utf-8") as f:
+        written = json.load(f)
+    assert len(written["stations"]) == 2000
+    assert len(written["plans"]) == 2000
+
+
+def test_dirty_flags_survive_a_failed_write(tmp_path, monkeypatch):
+    monkeypatch.setattr(station_snapshot, "REFRESH_DEBOUNCE_SECONDS", 0)
+    monkeypatch.setattr(station_snapshot, "REFRESH_RETRY_SECONDS", 0.01)
+    snapshot = PlanSnapshot(str(tmp_path / "snapshot.json"))
+    refreshed = []
+
+    async def refresh(refresh_all, refresh_stations, products):
+        refreshed.append((refresh_all, refresh_stations, set(products)))
+
+    def failing_write(data):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(snapshot, "_refresh", refresh)
+    monkeypatch.setattr(snapshot, "_write_data", failing_write)
+
+    async def run():
+        snapshot._dirty_products = {7}
+        snapshot._dirty_stations = True
+        snapshot._refresh_task = asyncio.ensure_future(snapshot._refresh_loop())
+        snapshot._refresh_wakeup.set()
+        while len(refreshed) < 2:
+            await asyncio.sleep(0.01)
+        await snapshot.stop()
+
+    asyncio.run(run())
+    # Повторная попытка получает те же флаги: запись не удалась
+    assert refreshed[0] == refreshed[1] == (False, True, {7})
+
+
+def test_concurrent_requests_share_one_database_fetch(monkeypatch):
+    monkeypatch.setattr(station_snapshot, "plan_snapshot", PlanSnapshot("unused.json"))
+    calls = []
+
+    async def fetch(computer_name):
+        calls.append(computer_name)
+        await asyncio.sleep(0.05)
+        return computer_name
+
+    monkeypatch.setattr(station_snapshot, "_fetch_station_plan", fetch)
+
+    async def run():
+        first = await asyncio.gather(*(
+            station_snapshot.resolve_station_plan(name) for name in ("PC-1", "pc-1", "PC-1", "PC-2")
+        ))
+        # Завершенный запрос не переиспользуется: следующий вызов снова идет в БД
+        second = await station_snapshot.resolve_station_plan("PC-1")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert calls == ["PC-1", "PC-2", "PC-1"]
+    assert first == ["PC-1", "PC-1", "PC-1", "PC-2"]
+    assert second == "PC-1"
+    assert station_snapshot._inflight_fetches == {}
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_fetch(monkeypatch):
+    monkeypatch.setattr(station_snapshot, "plan_snapshot", PlanSnapshot("unused.json"))
+
+    async def fetch(computer_name):
+        await asyncio.sleep(0.05)
+        return computer_name
+
+    monkeypatch.setattr(station_snapshot, "_fetch_station_plan", fetch)
+
+    async def run():
+        impatient = asyncio.ensure_future(station_snapshot.resolve_station_plan("PC-1"))
+        patient = asyncio.ensure_future(station_snapshot.resolve_station_plan("PC-1"))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        return await patient
+
+    assert asyncio.run(run()) == "PC-1"
+
+
+def test_remember_writes_the_file_without_refreshing(tmp_path, monkeypatch):
+    monkeypatch.setattr(station_snapshot, "REFRESH_DEBOUNCE_SECONDS", 0)
+    snapshot = PlanSnapshot(str(tmp_path / "snapshot.json"))
+    refreshed = []
+
+    async def refresh(*args):
+        refreshed.append(args)
+
+    monkeypatch.setattr(snapshot, "_refresh", refresh)
+
+    async def run():
+        snapshot._refresh_task = asyncio.ensure_future(snapshot._refresh_loop())
+        snapshot.remember("PC-1", schemas.AssemblyPlan.model_validate(_plan(3)))
+        while not (tmp_path / "snapshot.json").exists():
+            await asyncio.sleep(0.01)
+        await snapshot.stop()
+
+    asyncio.run(run())
+    with open(snapshot.path, encoding="utf-8") as f:
+        written = json.load(f)
+    assert refreshed == []
+    assert written["stations"] == {"pc-1": 3}
+    assert list(written["plans"]) == ["3"]
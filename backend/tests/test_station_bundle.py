@@ -0,0 +1,20 @@
+# Файл: backend/tests/test_station_bundle.py
+
+import asyncio
+
+from station import station_bundle
+
+
+def test_build_locks_do_not_grow_with_unknown_station_names(monkeypatch):
+    async def no_station(computer_name):
+        return None
+
+    monkeypatch.setattr(station_bundle, "build_station_bundle", no_station)
+
+    async def request_many():
+        for n in range(500):
+            assert await station_bundle.get_station_bundle(f"unknown-{n}") is None
+
+    asyncio.run(request_many())
+    assert len(station_bundle._build_locks) == station_bundle.BUILD_LOCK_STRIPES
+    assert not station_bundle._bundle_cache
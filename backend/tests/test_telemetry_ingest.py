@@ -0,0 +1,95 @@
+# Файл: backend/tests/test_telemetry_ingest.py
+
+import asyncio
+from datetime import datetime, timezone
+
+import asyncpg
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import exc as sa_exc
+
+from telemetry import telemetry_schemas as schemas
+from telemetry.telemetry_ingest import IngestionOverloaded, StepEventBuffer, is_permanent_write_error
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _record(step_id: int, duration_ms: int = 100):
+    return ("pc1", 1, 1, step_id, 1, "finish", NOW, duration_ms)
+
+
+def _buffer(**kwargs) -> StepEventBuffer:
+    options = dict(batch_size=100, flush_interval=0.01, max_pending=10_000, enqueue_timeout=1.0, retry_delay=0.001)
+    options.update(kwargs)
+    return StepEventBuffer(None, **options)
+
+
+def test_schema_rejects_values_outside_int4():
+    event = {"computerName": "pc1", "productId": 1, "planId": 1, "stepId": 1, "stepNumber": 1,
+             "eventType": "finish", "occurredAt": NOW.isoformat(), "durationMs": 10}
+    schemas.StepEventInput.model_validate(event)
+    for field in ("productId", "stepId", "durationMs"):
+        with pytest.raises(ValidationError):
+            schemas.StepEventInput.model_validate({**event, field: 2**40})
+    with pytest.raises(ValidationError):
+        schemas.StepEventInput.model_validate({**event, "planId": -1})
+
+
+def test_permanent_errors_are_found_through_sqlalchemy_wrapping():
+    cause = asyncpg.NumericValueOutOfRangeError("integer out of range")
+    wrapped = sa_exc.DBAPIError("INSERT ...", {}, RuntimeError("adapter error"))
+    wrapped.orig.__cause__ = cause
+    assert is_permanent_write_error(wrapped)
+    assert not is_permanent_write_error(OSError("connection reset"))
+
+
+def test_poison_event_is_dropped_and_the_rest_is_written():
+    buffer = _buffer()
+    written = []
+
+    async def write(batch):
+        if any(record[7] > 2**31 - 1 for record in batch):
+            raise asyncpg.NumericValueOutOfRangeError("integer out of range")
+        written.extend(batch)
+
+    buffer._write = write
+
+    async def run():
+        await buffer.start()
+        await buffer.submit([_record(n) for n in range(50)] + [_record(99, 2**40)] + [_record(n) for n in range(50, 60)])
+        await buffer.stop()
+
+    asyncio.run(run())
+    assert sorted(record[3] for record in written) == list(range(60))
+    assert buffer.dropped == 1
+    assert buffer.pending == 0
+
+
+def test_outage_applies_backpressure_and_loses_nothing():
+    buffer = _buffer(batch_size=5, max_pending=10, enqueue_timeout=0.05)
+    database_up = asyncio.Event()
+    attempts = []
+    written = []
+
+    async def write(batch):
+        attempts.append(len(batch))
+        if not database_up.is_set():
+            raise OSError("connection refused")
+        written.extend(batch)
+
+    buffer._write = write
+
+    async def run():
+        await buffer.start()
+        await buffer.submit([_record(n) for n in range(10)])
+        # БД лежит долго: попытки продолжаются, а новые события получают отказ (503)
+        while len(attempts) < 5:
+            await asyncio.sleep(0.01)
+        with pytest.raises(IngestionOverloaded):
+            await buffer.submit([_record(10)])
+        database_up.set()
+        await buffer.stop()
+
+    asyncio.run(run())
+    assert sorted(record[3] for record in written) == list(range(10))
+    assert buffer.dropped == 0
@@ -0,0 +1,142 @@
+# Файл: backend/tests/test_telemetry_rollups.py
+
+import asyncio
+import random
+import statistics
+from datetime import datetime, timezone
+
+import pytest
+
+from telemetry import telemetry_crud
+from telemetry.telemetry_rollups import (
+    SKETCH_RELATIVE_ACCURACY,
+    CycleTimeAggregate,
+    CycleTimeSketch,
+    aggregate_records,
+    bucket_start,
+)
+
+
+def _aggregate(values):
+    aggregate = CycleTimeAggregate()
+    for value in values:
+        aggregate.add(value)
+    return aggregate
+
+
+def test_merged_aggregates_match_single_pass():
+    rng = random.Random(1)
+    values = [rng.uniform(100, 20_000) for _ in range(3000)]
+    merged = CycleTimeAggregate()
+    for start in range(0, len(values), 700):
+        merged.merge(_aggregate(values[start:start + 700]))
+
+    assert merged.count == len(values)
+    assert merged.mean == pytest.approx(statistics.fmean(values))
+    assert merged.variance == pytest.approx(statistics.variance(values))
+    assert merged.min_ms == min(values)
+    assert merged.max_ms == max(values)
+    assert merged.sketch.bins == _aggregate(values).sketch.bins
+
+
+def test_merge_with_empty_aggregate_keeps_values():
+    aggregate = _aggregate([5.0, 7.0])
+    aggregate.merge(CycleTimeAggregate())
+    empty = CycleTimeAggregate()
+    empty.merge(_aggregate([5.0, 7.0]))
+    assert (aggregate.count, aggregate.mean, aggregate.min_ms) == (2, 6.0, 5.0)
+    assert (empty.count, empty.mean, empty.max_ms) == (2, 6.0, 7.0)
+
+
+@pytest.mark.parametrize("q", [0.5, 0.9, 0.99])
+def test_sketch_quantiles_within_relative_accuracy(q):
+    values = list(range(1, 10_001))
+    sketch = CycleTimeSketch()
+    for value in values:
+        sketch.add(value)
+    exact = values[int(q * (len(values) - 1))]
+    assert abs(sketch.quantile(q) - exact) / exact <= SKETCH_RELATIVE_ACCURACY * 1.01
+
+
+def test_sketch_json_round_trip_and_zero_values():
+    sketch = CycleTimeSketch()
+    for value in (0.0, 0.5, 10.0, 10.0, 1000.0):
+        sketch.add(value)
+    restored = CycleTimeSketch.from_json(sketch.to_json())
+    assert restored.bins == sketch.bins
+    assert restored.zero_count == 2
+    assert restored.quantile(0.0) == 0.0
+    assert CycleTimeSketch.from_json(None).count == 0
+
+
+def test_aggregate_records_counts_only_finished_steps_with_duration():
+    moment = datetime(2025, 1, 1, 10, 17, tzinfo=timezone.utc)
+    records = [
+        ("pc1", 1, 2, 3, 1, "start", moment, None),
+        ("pc1", 1, 2, 3, 1, "finish", moment, 1500),
+        ("pc1", 1, 2, 3, 1, "finish", moment, None),
+        ("pc1", 1, 2, 3, 1, "finish", moment, 2500),
+    ]
+    partials = aggregate_records(records)
+    assert len(partials) == 1
+    ((step_number, aggregate),) = partials.values()
+    assert step_number == 1
+    assert (aggregate.count, aggregate.mean) == (2, 2000.0)
+
+
+def test_renumbered_step_shares_one_rollup_row():
+    # Ключ совпадает с уникальным ограничением, иначе INSERT ... ON CONFLICT
+    # получил бы две строки для одной записи в таблице
+    moment = datetime(2025, 1, 1, 10, 17, tzinfo=timezone.utc)
+    records = [
+        ("pc1", 1, 2, 3, 1, "finish", moment, 1000),
+        ("pc1", 1, 2, 3, 4, "finish", moment, 3000),
+    ]
+    partials = aggregate_records(records)
+    assert list(partials) == [(1, 2, 3, "pc1", bucket_start(moment))]
+    step_number, aggregate = partials[(1, 2, 3, "pc1", bucket_start(moment))]
+    assert (step_number, aggregate.count, aggregate.mean) == (4, 2, 2000.0)
+
+
+def test_bucket_start_is_aligned():
+    start = bucket_start(datetime(2025, 1, 1, 10, 17, 42, tzinfo=timezone.utc))
+    assert start <= datetime(2025, 1, 1, 10, 17, 42, tzinfo=timezone.utc)
+    assert start.second == 0 and start.microsecond == 0
+
+
+def test_rollup_writes_are_split_below_the_parameter_limit(monkeypatch):
+    moment = datetime(2025, 1, 1, 10, tzinfo=timezone.utc)
+    partials = aggregate_records([("pc1", 1, 2, step, step, "finish", moment, 1000) for step in range(7000)])
+    chunks = []
+
+    async def record_chunk(conn, keys, chunk_partials):
+        chunks.append(keys)
+
+    monkeypatch.setattr(telemetry_crud, "_apply_rollup_chunk", record_chunk)
+    asyncio.run(telemetry_crud.apply_cycle_time_rollups(None, partials))
+
+    assert [len(keys) for keys in chunks] == [3000, 3000, 1000]
+    assert sum(chunks, []) == sorted(partials)
+    # INSERT передает 10 параметров на строку: 5 ключевых колонок, step_number и 4 начальных значения
+    assert telemetry_crud.ROLLUP_WRITE_CHUNK * 10 < 32767
+
+
+def test_stored_rollup_merges_like_a_single_pass():
+    rng = random.Random(7)
+    stored_values = [rng.uniform(200, 9000) for _ in range(500)]
+    batch_values = [rng.uniform(200, 9000) for _ in range(300)]
+    stored = _aggregate(stored_values)
+    row = {
+        "count": stored.count, "mean_ms": stored.mean, "m2": stored.m2,
+        "min_ms": stored.min_ms, "max_ms": stored.max_ms, "sketch": stored.sketch.to_json(),
+    }
+
+    merged = telemetry_crud._aggregate_from_row(row)
+    merged.merge(_aggregate(batch_values))
+    expected = _aggregate(stored_values + batch_values)
+
+    assert merged.count == expected.count
+    assert merged.mean == pytest.approx(expected.mean)
+    assert merged.variance == pytest.approx(expected.variance)
+    assert (merged.min_ms, merged.max_ms) == (expected.min_ms, expected.max_ms)
+    assert merged.sketch.bins == expected.sketch.bins
@@ -0,0 +1,127 @@
+# Файл: backend/tests/test_thumbnails.py
+
+import asyncio
+import os
+import struct
+import subprocess
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+from core.config import settings
+from core.invalidation import InvalidationEvent, InvalidationKind
+from glb_factory import CUBE_INDICES, CUBE_POSITIONS, make_glb
+from graphic import graphic_thumbnail_index as thumbnail_index
+from graphic import graphic_thumbnails as thumbnails
+
+
+def test_load_glb_applies_node_transform():
+    glb = make_glb([(0, 0, 0), (1, 0, 0), (0, 1, 0)], [0, 1, 2], node={"translation": [10, 0, 0], "scale": [2, 2, 2]})
+    triangles, colors = thumbnails.load_glb_triangles(glb)
+    assert triangles.shape == (1, 3, 3)
+    np.testing.assert_allclose(triangles[0], [[10, 0, 0], [12, 0, 0], [10, 2, 0]])
+    np.testing.assert_allclose(colors[0], thumbnails.DEFAULT_COLOR)
+
+
+def test_render_cube_fills_center_and_leaves_corners_transparent():
+    triangles, colors = thumbnails.load_glb_triangles(make_glb(CUBE_POSITIONS, CUBE_INDICES, base_color=[1, 0, 0, 1]))
+    image = thumbnails.render_triangles(triangles, colors, size=64)
+    assert image.shape == (64, 64, 4)
+    assert image[32, 32, 3] == 255
+    assert image[0, 0, 3] == 0 and image[63, 63, 3] == 0
+    # Красный материал: зеленого и синего в закрашенных пикселях нет
+    covered = image[..., 3] == 255
+    assert image[covered, 0].min() > 0 and image[covered, 1].max() == 0
+
+
+def test_encode_png_is_decodable():
+    rgba = np.zeros((3, 5, 4), dtype=np.uint8)
+    rgba[1, 2] = (10, 20, 30, 255)
+    png = thumbnails.encode_png(rgba)
+    assert png.startswith(b"\x89PNG\r\n\x1a\n")
+    width, height = struct.unpack(">II", png[16:24])
+    assert (width, height) == (5, 3)
+    idat_length = struct.unpack(">I", png[33:37])[0]
+    raw = zlib.decompress(png[41:41 + idat_length])
+    rows = np.frombuffer(raw, dtype=np.uint8).reshape(3, 1 + 5 * 4)
+    assert (rows[:, 0] == 0).all()
+    assert tuple(rows[1, 1 + 2 * 4:1 + 3 * 4]) == (10, 20, 30, 255)
+
+
+def test_not_a_glb_raises_thumbnail_error():
+    with pytest.raises(thumbnails.ThumbnailError):
+        thumbnails.load_glb_triangles(b"definitely not a model file")
+
+
+def test_models_above_the_triangle_limit_are_not_rendered():
+    glb = make_glb(CUBE_POSITIONS, CUBE_INDICES)
+    assert len(thumbnails.load_glb_triangles(glb, max_triangles=12)[0]) == 12
+    with pytest.raises(thumbnails.ThumbnailError, match="more than 11 triangles"):
+        thumbnails.load_glb_triangles(glb, max_triangles=11)
+
+
+def test_failed_refresh_removes_the_stale_thumbnail(tmp_path):
+    model_file = tmp_path / "product_1.glb"
+    model_file.write_bytes(b"not a model")
+    stale = tmp_path / "product_1.png"
+    stale.write_bytes(b"old preview")
+    thumbnails.refresh_thumbnail(str(model_file))
+    assert not stale.exists()
+
+    model_file.write_bytes(make_glb(CUBE_POSITIONS, CUBE_INDICES))
+    thumbnails.refresh_thumbnail(str(model_file))
+    assert stale.read_bytes().startswith(b"\x89PNG")
+
+
+def test_thumbnail_url_needs_neither_disk_nor_numpy():
+    # Схемы импортируются везде (GraphQL, станции): растеризатор им не нужен
+    code = (
+        "import sys, os;"
+        "from graphic import graphic_thumbnail_index;"
+        "from graphic.graphic_schemas import Product;"
+        "assert 'numpy' not in sys.modules and 'graphic.graphic_thumbnails' not in sys.modules;"
+        "graphic_thumbnail_index._versions = {'product_1.png': 123};"
+        "os.stat = os.scandir = None;"
+        "p = Product(id=1, name='Pump', model_path='/static/models/product_1.glb');"
+        "assert p.thumbnail_url == '/static/models/product_1.png?v=123', p.thumbnail_url;"
+        "assert Product(id=2, name='Valve', model_path='/static/models/product_2.glb').thumbnail_url is None;"
+        "assert Product(id=3, name='Empty').thumbnail_url is None"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+
+
+def test_index_tracks_renders_and_failures(tmp_path, monkeypatch):
+    monkeypatch.setattr(thumbnail_index, "_versions", {})
+    model_file = tmp_path / "product_1.glb"
+    model_file.write_bytes(make_glb(CUBE_POSITIONS, CUBE_INDICES))
+    model_path = "/static/models/product_1.glb"
+    assert thumbnail_index.thumbnail_url_for(model_path) is None
+
+    thumbnails.refresh_thumbnail(str(model_file))
+    version = os.stat(tmp_path / "product_1.png").st_mtime_ns
+    assert thumbnail_index.thumbnail_url_for(model_path) == f"/static/models/product_1.png?v={version}"
+
+    model_file.write_bytes(b"not a model")
+    thumbnails.refresh_thumbnail(str(model_file))
+    assert thumbnail_index.thumbnail_url_for(model_path) is None
+
+
+def test_other_workers_pick_up_thumbnails_on_invalidation(tmp_path, monkeypatch):
+    monkeypatch.setattr(thumbnail_index, "_versions", {})
+    monkeypatch.setattr(settings, "MODELS_DIR", str(tmp_path))
+    (tmp_path / "product_1.glb").write_bytes(b"model")
+    (tmp_path / "product_2.png").write_bytes(b"preview")
+
+    async def run():
+        # Превью нарисовал другой воркер: здесь видно только событие из шины
+        thumbnail_index._on_invalidation(InvalidationEvent(InvalidationKind.WORKSTATION))
+        assert thumbnail_index._rescan_task is None or thumbnail_index._rescan_task.done()
+        thumbnail_index._on_invalidation(InvalidationEvent(InvalidationKind.PRODUCT, "2"))
+        thumbnail_index._on_invalidation(InvalidationEvent(InvalidationKind.PRODUCT, "3"))
+        await thumbnail_index._rescan_task
+
+    asyncio.run(run())
+    assert set(thumbnail_index._versions) == {"product_2.png"}
+    assert thumbnail_index.thumbnail_url_for("/static/models/product_2.glb").startswith("/static/models/product_2.png?v=")
@@ -0,0 +1,62 @@
+# Файл: backend/tests/test_workstation_upsert.py
+
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Select
+
+from graphic import graphic_crud as crud
+from graphic import graphic_schemas as schemas
+
+
+class _FakeSession:
+    """В БД уже есть станции stored; SELECT возвращает их, INSERT запоминается."""
+
+    def __init__(self, stored):
+        self.stored = stored
+        self.inserts = []
+        self._rows = []
+
+    async def execute(self, stmt, execution_options=None):
+        if isinstance(stmt, Select):
+            names = stmt.compile(dialect=postgresql.asyncpg.dialect()).params["names"]
+            self._rows = [name for name in self.stored if name.lower() in names]
+        else:
+            self.inserts.append(stmt.compile(dialect=postgresql.asyncpg.dialect()))
+            self._rows = []
+        return self
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self._rows
+
+    async def commit(self):
+        pass
+
+
+def _inserted(compiled, column):
+    return sorted(value for name, value in compiled.params.items() if name.startswith(column))
+
+
+def test_names_differing_only_in_case_are_one_workstation():
+    db = _FakeSession(stored=["PC-01"])
+    workstations = [
+        schemas.WorkstationInput(computer_name="pc-01", product_id=1),
+        schemas.WorkstationInput(computer_name="Pc-01", product_id=2),
+        schemas.WorkstationInput(computer_name="PC-02", product_id=1),
+    ]
+    asyncio.run(crud.upsert_workstations_orm(db, workstations))
+
+    (compiled,) = db.inserts
+    # Конфликт по обычному уникальному computer_name: индекс на lower() не нужен
+    assert "ON CONFLICT (computer_name)" in str(compiled)
+    # Существующая станция сохраняет свое написание, последняя запись побеждает
+    assert _inserted(compiled, "computer_name") == ["PC-01", "PC-02"]
+    assert _inserted(compiled, "product_id") == [1, 2]
+
+
+def test_oldest_spelling_wins_when_stored_names_differ_only_in_case():
+    db = _FakeSession(stored=["STATION-7", "station-7"])
+    assert asyncio.run(crud.get_stored_computer_names_orm(db, ["Station-7"])) == {"station-7": "STATION-7"}
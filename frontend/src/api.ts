@@ -1,6 +1,14 @@
 // frontend/src/api.ts
 import { checkUserSession } from './auth';
-const GQL_ENDPOINT = 'http://localhost:8000/graphql';
+import { decodeMsgpack } from './msgpack';
+export const API_BASE = 'http://localhost:8000';
+const GQL_ENDPOINT = `${API_BASE}/graphql`;
+
+// Ответ /stations/{name}/bundle: JSON-часть и (опционально) байты GLB-модели
+export interface StationBundle {
+    bundle: any;
+    model: ArrayBuffer | null;
+}
 
 export async function fetchGraphQL(query: string, variables: object = {}, isProtected: boolean = false) {
     const headers = new Headers({ 'Content-Type': 'application/json' });
@@ -33,4 +41,215 @@ export async function fetchGraphQL(query: string, variables: object = {}, isProt
         console.error("GraphQL request failed:", error);
         throw error;
     }
-}
\ No newline at end of file
+}
+
+export interface GraphQLOperation {
+    query: string;
+    variables?: object;
+}
+
+// Лимит операций в одном POST задает сервер (GRAPHQL_MAX_BATCH_OPERATIONS) и
+// сообщает в заголовке каждого ответа на пакет. До первого ответа лимит неизвестен:
+// слишком большой пакет сервер отклонит с 413, и он будет отправлен заново частями.
+const MAX_BATCH_HEADER = 'X-GraphQL-Max-Batch-Operations';
+let maxBatchOperations = Infinity;
+
+// Отправляет операции пакетами (не больше лимита сервера в одном POST) и возвращает
+// массив их data в том же порядке. Пакеты идут друг за другом: мутации на сервере
+// выполняются по порядку, независимые запросы внутри пакета - параллельно.
+// После первой ошибки следующие пакеты не отправляются, а сервер пропускает
+// оставшиеся мутации текущего пакета.
+export async function fetchGraphQLBatch(operations: GraphQLOperation[], isProtected: boolean = false): Promise<any[]> {
+    if (isProtected && !(await checkUserSession())) {
+        alert("Auth Error: Token not found. Redirecting to login.");
+        window.location.href = '/login.html';
+        throw new Error("Token not found.");
+    }
+    const data: any[] = [];
+    let start = 0;
+    while (start < operations.length) {
+        const chunk = operations.slice(start, start + maxBatchOperations);
+        const results = await postGraphQLBatch(chunk);
+        // null - сервер сообщил меньший лимит, делим ту же часть заново
+        if (results === null) continue;
+        data.push(...results);
+        start += chunk.length;
+    }
+    return data;
+}
+
+// Читает лимит сервера из ответа; возвращает true, если он меньше отправленного пакета
+function updateBatchLimit(response: Response, sent: number): boolean {
+    const limit = Number(response.headers.get(MAX_BATCH_HEADER));
+    if (!Number.isInteger(limit) || limit < 1) return false;
+    maxBatchOperations = limit;
+    return limit < sent;
+}
+
+async function postGraphQLBatch(operations: GraphQLOperation[]): Promise<any[] | null> {
+    try {
+        const response = await fetch(GQL_ENDPOINT, {
+            method: 'POST',
+            headers: new Headers({ 'Content-Type': 'application/json' }),
+            body: JSON.stringify(operations.map(op => ({ query: op.query, variables: op.variables || {} }))),
+            credentials: 'include',
+        });
+
+        const tooLarge = updateBatchLimit(response, operations.length);
+        if (response.status === 413 && tooLarge) return null;
+        if (!response.ok) throw new Error(`Network error: ${response.statusText}`);
+
+        const results: any[] = await response.json();
+        const errors = results.flatMap(result => result.errors || []);
+        if (errors.length > 0) throw new Error(errors.map((e: any) => e.message).join('\n'));
+
+        return results.map(result => result.data);
+    } catch (error) {
+        console.error("GraphQL batch request failed:", error);
+        throw error;
+    }
+}
+
+// Ищет последовательность байт needle в haystack, начиная с позиции from
+function indexOfBytes(haystack: Uint8Array, needle: Uint8Array, from: number): number {
+    outer: for (let i = from; i <= haystack.length - needle.length; i++) {
+        for (let j = 0; j < needle.length; j++) {
+            if (haystack[i + j] !== needle[j]) continue outer;
+        }
+        return i;
+    }
+    return -1;
+}
+
+interface MultipartPart {
+    contentType: string;
+    body: Uint8Array;
+}
+
+// Разбирает multipart/mixed ответ на части (из заголовков части нужен только Content-Type)
+function splitMultipart(buffer: ArrayBuffer, boundary: string): MultipartPart[] {
+    const bytes = new Uint8Array(buffer);
+    const encoder = new TextEncoder();
+    const delimiter = encoder.encode(`--${boundary}`);
+    const headerEnd = encoder.encode('\r\n\r\n');
+    const decoder = new TextDecoder();
+    const parts: MultipartPart[] = [];
+
+    let start = indexOfBytes(bytes, delimiter, 0);
+    while (start !== -1) {
+        const headerPos = indexOfBytes(bytes, headerEnd, start);
+        if (headerPos === -1) break;
+        const bodyStart = headerPos + headerEnd.length;
+        const next = indexOfBytes(bytes, delimiter, bodyStart);
+        if (next === -1) break;
+        const headers = decoder.decode(bytes.subarray(start + delimiter.length, headerPos));
+        const contentType = headers.match(/^content-type:\s*(.+)$/im)?.[1].trim() || '';
+        // Перед следующим разделителем стоит \r\n, он не относится к телу части
+        parts.push({ contentType, body: bytes.subarray(bodyStart, next - 2) });
+        start = next;
+    }
+    return parts;
+}
+
+const MSGPACK_MEDIA_TYPE = 'application/x-msgpack';
+
+// Разворачивает компактный план (таблица компонентов + шаги-массивы, см.
+// backend/graphic/graphic_codec.py) в тот же вид, что и JSON-ответ
+export function expandCompactPlan(data: any): any {
+    if (data.v !== 1) throw new Error(`Unsupported compact plan version: ${data.v}`);
+    const toObject = (fields: string[], row: unknown[]) =>
+        Object.fromEntries(fields.map((name, i) => [name, row[i]]));
+    const components = data.components.map((row: unknown[]) => toObject(data.componentFields, row));
+    const steps = data.steps.map((row: unknown[]) => {
+        const step = toObject(data.stepFields, row);
+        step.component = components[step.component as number];
+        return step;
+    });
+    return { id: data.id, name: data.name, product: data.product, steps };
+}
+
+// Бандл приходит в MessagePack (план в компактном виде) или, от старых серверов, в JSON
+function decodeBundle(contentType: string, body: Uint8Array): any {
+    if (contentType.split(';')[0].trim().toLowerCase() !== MSGPACK_MEDIA_TYPE) {
+        return JSON.parse(new TextDecoder().decode(body));
+    }
+    const bundle = decodeMsgpack(body) as any;
+    return { ...bundle, plan: expandCompactPlan(bundle.plan) };
+}
+
+// Загружает план, манифест и саму модель станции одним запросом
+export async function fetchStationBundle(stationName: string): Promise<StationBundle> {
+    const url = `${API_BASE}/stations/${encodeURIComponent(stationName)}/bundle?include_model=true`;
+    const response = await fetch(url, {
+        credentials: 'include',
+        // Большие планы в MessagePack в разы меньше и быстрее разбираются
+        headers: { 'Accept': `${MSGPACK_MEDIA_TYPE}, application/json;q=0.9` },
+    });
+    if (response.status === 404) throw new Error(`No assembly plan found for computer: ${stationName}`);
+    if (!response.ok) throw new Error(`Network error: ${response.statusText}`);
+
+    const contentType = response.headers.get('Content-Type') || '';
+    const boundaryMatch = contentType.match(/boundary=([^;]+)/);
+    if (!boundaryMatch) {
+        // У продукта нет модели - сервер вернул только сам бандл
+        return { bundle: decodeBundle(contentType, new Uint8Array(await response.arrayBuffer())), model: null };
+    }
+
+    const [bundlePart, modelPart] = splitMultipart(await response.arrayBuffer(), boundaryMatch[1]);
+    const bundle = decodeBundle(bundlePart.contentType, bundlePart.body);
+    const model = modelPart ? (modelPart.body.slice().buffer as ArrayBuffer) : null;
+    return { bundle, model };
+}
+
+
+// --- Телеметрия шагов ---
+export interface StepEvent {
+    computerName: string;
+    productId: number;
+    planId: number;
+    stepId: number;
+    stepNumber: number;
+    eventType: 'start' | 'finish';
+    occurredAt: string;
+    durationMs?: number;
+}
+
+const TELEMETRY_FLUSH_MS = 5000;
+let pendingStepEvents: StepEvent[] = [];
+let telemetryTimer: number | null = null;
+
+async function flushStepEvents(): Promise<void> {
+    telemetryTimer = null;
+    if (pendingStepEvents.length === 0) return;
+    const events = pendingStepEvents;
+    pendingStepEvents = [];
+    try {
+        const response = await fetch(`${API_BASE}/telemetry/step-events`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ events }),
+            keepalive: true,
+        });
+        // 503 - сервер перегружен: вернем события в очередь и попробуем позже
+        if (response.status === 503) throw new Error('Telemetry ingestion is overloaded');
+    } catch (error) {
+        console.warn("Failed to send step events, will retry:", error);
+        pendingStepEvents = events.concat(pendingStepEvents);
+        scheduleStepEventsFlush();
+    }
+}
+
+function scheduleStepEventsFlush(): void {
+    if (telemetryTimer === null) {
+        telemetryTimer = window.setTimeout(flushStepEvents, TELEMETRY_FLUSH_MS);
+    }
+}
+
+// Копит события и отправляет их пачкой раз в несколько секунд
+export function queueStepEvent(event: StepEvent): void {
+    pendingStepEvents.push(event);
+    scheduleStepEventsFlush();
+}
+
+// При закрытии страницы отправляем то, что не успели
+window.addEventListener('pagehide', () => { void flushStepEvents(); });
@@ -1,12 +1,13 @@
 // frontend/src/dashboard.ts
 
-import { fetchGraphQL } from './api';
+import { API_BASE, fetchGraphQL } from './api';
 import { checkUserSession } from './auth';
 
 // Интерфейс для данных, которые мы получаем
 interface Product {
     id: number;
     name: string;
+    thumbnailUrl?: string | null;
 }
 
 class Dashboard {
@@ -37,6 +38,7 @@ class Dashboard {
                 allProducts {
                     id
                     name
+                    thumbnailUrl
                 }
             }
         `;
@@ -64,6 +66,20 @@ class Dashboard {
                     const textSpan = document.createElement('span');
                     textSpan.textContent = `${product.name} (ID: ${product.id})`;
 
+                    // Превью рисует сервер при загрузке модели, GLB для списка не скачиваем
+                    const thumbnail = document.createElement('img');
+                    thumbnail.width = 64;
+                    thumbnail.height = 64;
+                    thumbnail.loading = 'lazy';
+                    thumbnail.alt = product.name;
+                    if (product.thumbnailUrl) {
+                        // Превью может еще рисоваться или не существовать (слишком большая модель)
+                        thumbnail.onerror = () => { thumbnail.style.visibility = 'hidden'; };
+                        thumbnail.src = `${API_BASE}${product.thumbnailUrl}`;
+                    } else {
+                        thumbnail.style.visibility = 'hidden';
+                    }
+
                     const editButton = document.createElement('button');
                     editButton.textContent = 'Edit';
                     editButton.style.width = 'auto';
@@ -74,6 +90,7 @@ class Dashboard {
                         window.location.href = `/editor.html?product_id=${product.id}`;
                     };
 
+                    li.appendChild(thumbnail);
                     li.appendChild(textSpan);
                     li.appendChild(editButton);
                     this.productListEl.appendChild(li);
@@ -3,7 +3,7 @@ import { GLTFLoader } from 'three/examples/jsm/loaders/GLTFLoader.js';
 import { OrbitControls } from 'three/examples/jsm/controls/OrbitControls.js';
 import Sortable from 'sortablejs';
 import * as TWEEN from '@tweenjs/tween.js';
-import { fetchGraphQL } from './api';
+import { fetchGraphQL, fetchGraphQLBatch } from './api';
 import { checkUserSession } from './auth';
 // --- Интерфейсы для данных ---
 interface Component {
@@ -371,24 +371,28 @@ class AssemblyEditor {
             // с реальным ID, полученным из базы данных.
             const componentIdMap = new Map<number, number>();
 
-            // ЭТАП 1: Сохраняем каждый компонент по отдельности, чтобы получить его реальный ID.
-            for (const comp of this.components) {
-                const mutation = `
+            // ЭТАП 1: Сохраняем все компоненты пакетными запросами (fetchGraphQLBatch сам делит по лимиту сервера), чтобы получить их реальные ID.
+            // После первой ошибки оставшиеся компоненты не сохраняются: fetchGraphQLBatch бросает исключение.
+            const addComponentMutation = `
                 mutation AddComponent($component: ComponentInput!) {
                     addComponent(component: $component){
                         id # Нам от сервера нужен только ID
                     }
                 }
             `;
-                const variables = {
+            const results = await fetchGraphQLBatch(this.components.map(comp => ({
+                query: addComponentMutation,
+                variables: {
                     component: {
                         productId: this.productId,
                         name: comp.name,
                         meshId: comp.meshId
                     }
-                };
-                const data = await fetchGraphQL(mutation, variables);
+                }
+            })));
 
+            this.components.forEach((comp, index) => {
+                const data = results[index];
                 // --- ИСПРАВЛЕНИЕ №1: Сохраняем только числовой ID, а не весь объект. ---
                 if (data && data.addComponent && typeof data.addComponent.id === 'number') {
                     componentIdMap.set(comp.tempId, data.addComponent.id);
@@ -396,7 +400,7 @@ class AssemblyEditor {
                     // Прерываем выполнение, если сервер не вернул корректный ID.
                     throw new Error(`Не удалось получить корректный ID для компонента "${comp.name}".`);
                 }
-            }
+            });
 
             // ЭТАП 2: Формируем данные для шагов сборки, используя реальные ID.
             const stepsDataForGQL = stepNodes.map((node, index) => {
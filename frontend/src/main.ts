@@ -2,18 +2,20 @@ import * as THREE from 'three';
 import { GLTFLoader } from 'three/examples/jsm/loaders/GLTFLoader.js';
 import { OrbitControls } from 'three/examples/jsm/controls/OrbitControls.js';
 import * as TWEEN from '@tweenjs/tween.js';
-import { fetchGraphQL } from './api';
+import { fetchStationBundle, queueStepEvent } from './api';
 // --- Типы данных, соответствующие GraphQL схеме ---
 interface Component {
     name: string;
     meshId: string;
 }
 interface AssemblyStep {
+    id: number;
     stepNumber: number;
     actionType: string;
     component: Component;
 }
 interface AssemblyPlan {
+    id: number;
     name: string;
     steps: AssemblyStep[];
     product: Product; // <--- ДОБАВЛЯЕМ ЭТО ПОЛЕ
@@ -45,6 +47,8 @@ class AssemblyApp {
     private tweenGroup: TWEEN.Group;
     // Данные и состояние
     private plan?: AssemblyPlan;
+    private stationName = '';
+    private stepStartedAt = 0;
     private currentStepIndex = -1;
 
 
@@ -103,45 +107,23 @@ class AssemblyApp {
         this.animate();
         window.addEventListener('resize', this.onWindowResize);
     }
-    private async fetchPlanByComputerName(computerName: string): Promise<void> {
-        // --- ЗАМЕНЯЕМ ЗАГЛУШКУ НА РЕАЛЬНЫЙ ЗАПРОС ---
-        const query = `
-        query GetPlanByComputer($computerName: String!) {
-            assemblyPlanByComputerName(computerName: $computerName) {
-                name
-                steps {
-                    stepNumber
-                    actionType
-                    component {
-                        name
-                        meshId
-                    }
-                }
-                product {
-                    name
-                    modelPath
-                }
-            }
-        }
-    `;
-
+    private async fetchStationBundle(computerName: string): Promise<ArrayBuffer | null> {
+        // Один запрос вместо трех: план, манифест модели и сама модель
         try {
-            // Вызываем универсальную функцию. Она вернет либо данные, либо выбросит ошибку.
-            const data = await fetchGraphQL(query, { computerName });
+            const { bundle, model } = await fetchStationBundle(computerName);
+            this.plan = bundle.plan;
 
-            this.plan = data.assemblyPlanByComputerName;
-
-            // Проверяем, что бэкенд не вернул null (например, если станция не найдена)
-            if (!this.plan) {
-                throw new Error(`No assembly plan found for computer: ${computerName}`);
+            if (bundle.model && bundle.model.manifest.missingMeshIds.length > 0) {
+                console.warn("Meshes from the plan are missing in the model:", bundle.model.manifest.missingMeshIds);
             }
+            return model;
 
         } catch (error) {
-            console.error("Failed to fetch assembly plan:", error);
-            // Просто отображаем ошибку, которую нам вернула fetchGraphQL
+            console.error("Failed to fetch station bundle:", error);
             if (error instanceof Error) {
                 this.stepActionEl.innerText = `Error: ${error.message}`;
             }
+            return null;
         }
     }
     private async init() {
@@ -155,15 +137,15 @@ class AssemblyApp {
             return;
         }
 
-        // 2. Запрашиваем с бэкенда план сборки и путь к модели по имени станции.
-        await this.fetchPlanByComputerName(stationName);
+        this.stationName = stationName;
+
+        // 2. Запрашиваем с бэкенда бандл станции: план сборки вместе с 3D-моделью.
+        const modelData = await this.fetchStationBundle(stationName);
         
         // 3. Проверяем, что бэкенд вернул нам все необходимые данные.
-        if (this.plan && this.plan.product && this.plan.product.modelPath) {
-            // Если все ОК, загружаем 3D-модель по полученному пути.
-            const fullUrl = this.plan.product.modelPath;
-            console.log(this.plan.product.modelPath);
-            await this.loadModel(fullUrl);
+        if (this.plan && modelData) {
+            // Если все ОК, разбираем уже загруженную 3D-модель.
+            await this.loadModel(modelData);
         } else {
             // Если данных нет, показываем ошибку и останавливаемся.
             this.stepActionEl.innerText = "Error: Plan or model path not found for this station.";
@@ -256,12 +238,11 @@ class AssemblyApp {
 
     // frontend/src/main.ts
 
-    private async loadModel(path: string): Promise<void> {
+    private async loadModel(data: ArrayBuffer): Promise<void> {
         const loader = new GLTFLoader();
         try {
-            const fullUrl = `http://localhost:8000${path}`;
-            console.log(`Attempting to load model from: ${fullUrl}`);
-            const gltf = await loader.loadAsync(fullUrl);
+            console.log(`Parsing model from bundle (${data.byteLength} bytes)`);
+            const gltf = await loader.parseAsync(data, '');
             this.model = gltf.scene;
 
             // Проходим по всем дочерним элементам загруженной модели.
@@ -333,6 +314,7 @@ class AssemblyApp {
             if (prevObject) {
                 prevObject.material = this.completedMaterial;
             }
+            this.reportStep(prevStep, 'finish');
         }
 
         // 2. Перейти к следующему шагу
@@ -349,6 +331,8 @@ class AssemblyApp {
         // 4. Обработать текущий шаг
         const currentStep = this.plan.steps[this.currentStepIndex];
 
+        this.reportStep(currentStep, 'start');
+
         // Очищаем старые метки
         this.clearLabels();
 
@@ -368,6 +352,25 @@ class AssemblyApp {
         this.stepNumberEl.innerText = currentStep.stepNumber.toString();
         this.stepActionEl.innerText = `${currentStep.actionType}: ${currentStep.component.name}`;
     }
+    // Отправляем на бэкенд событие начала/окончания шага (пачками, в фоне)
+    private reportStep(step: AssemblyStep, eventType: 'start' | 'finish'): void {
+        if (!this.plan) return;
+        const now = performance.now();
+        if (eventType === 'start') {
+            this.stepStartedAt = now;
+        }
+        queueStepEvent({
+            computerName: this.stationName,
+            productId: this.plan.product.id,
+            planId: this.plan.id,
+            stepId: step.id,
+            stepNumber: step.stepNumber,
+            eventType,
+            occurredAt: new Date().toISOString(),
+            // Длительность шага считаем на станции - по ней строятся агрегаты
+            durationMs: eventType === 'finish' ? Math.round(now - this.stepStartedAt) : undefined,
+        });
+    }
     private animate = (): void => {
         requestAnimationFrame(this.animate);
         // Обновляем позиции меток в каждом кадре
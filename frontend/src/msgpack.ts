@@ -0,0 +1,109 @@
+// frontend/src/msgpack.ts
+// Минимальный декодер MessagePack для бандла станции (без внешних зависимостей).
+// Поддерживаются все типы, кроме ext: их сервер не отправляет.
+
+class MsgpackReader {
+    private offset = 0;
+    private bytes: Uint8Array;
+    private view: DataView;
+    private textDecoder = new TextDecoder();
+
+    // Без параметров-свойств: файл должен загружаться в Node со strip-types (npm test)
+    constructor(bytes: Uint8Array) {
+        this.bytes = bytes;
+        this.view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    }
+
+    read(): unknown {
+        const type = this.uint8();
+        if (type <= 0x7f) return type;                               // positive fixint
+        if (type >= 0xe0) return type - 0x100;                       // negative fixint
+        if ((type & 0xf0) === 0x80) return this.map(type & 0x0f);    // fixmap
+        if ((type & 0xf0) === 0x90) return this.array(type & 0x0f);  // fixarray
+        if ((type & 0xe0) === 0xa0) return this.str(type & 0x1f);    // fixstr
+
+        switch (type) {
+            case 0xc0: return null;
+            case 0xc2: return false;
+            case 0xc3: return true;
+            case 0xc4: return this.bin(this.uint8());
+            case 0xc5: return this.bin(this.uint16());
+            case 0xc6: return this.bin(this.uint32());
+            case 0xca: return this.step(4, this.view.getFloat32(this.offset));
+            case 0xcb: return this.step(8, this.view.getFloat64(this.offset));
+            case 0xcc: return this.uint8();
+            case 0xcd: return this.uint16();
+            case 0xce: return this.uint32();
+            case 0xcf: return Number(this.step(8, this.view.getBigUint64(this.offset)));
+            case 0xd0: return this.step(1, this.view.getInt8(this.offset));
+            case 0xd1: return this.step(2, this.view.getInt16(this.offset));
+            case 0xd2: return this.step(4, this.view.getInt32(this.offset));
+            case 0xd3: return Number(this.step(8, this.view.getBigInt64(this.offset)));
+            case 0xd9: return this.str(this.uint8());
+            case 0xda: return this.str(this.uint16());
+            case 0xdb: return this.str(this.uint32());
+            case 0xdc: return this.array(this.uint16());
+            case 0xdd: return this.array(this.uint32());
+            case 0xde: return this.map(this.uint16());
+            case 0xdf: return this.map(this.uint32());
+        }
+        throw new Error(`Unsupported MessagePack type 0x${type.toString(16)} at offset ${this.offset - 1}`);
+    }
+
+    get done(): boolean {
+        return this.offset >= this.bytes.length;
+    }
+
+    // Сдвигает позицию после чтения значения фиксированной длины
+    private step<T>(size: number, value: T): T {
+        this.offset += size;
+        return value;
+    }
+
+    private uint8(): number {
+        return this.step(1, this.view.getUint8(this.offset));
+    }
+
+    private uint16(): number {
+        return this.step(2, this.view.getUint16(this.offset));
+    }
+
+    private uint32(): number {
+        return this.step(4, this.view.getUint32(this.offset));
+    }
+
+    private slice(length: number): Uint8Array {
+        if (this.offset + length > this.bytes.length) throw new Error("Truncated MessagePack data");
+        return this.step(length, this.bytes.subarray(this.offset, this.offset + length));
+    }
+
+    private str(length: number): string {
+        return this.textDecoder.decode(this.slice(length));
+    }
+
+    private bin(length: number): Uint8Array {
+        return this.slice(length).slice();
+    }
+
+    private array(length: number): unknown[] {
+        const items: unknown[] = [];
+        for (let i = 0; i < length; i++) items.push(this.read());
+        return items;
+    }
+
+    private map(length: number): Record<string, unknown> {
+        const result: Record<string, unknown> = {};
+        for (let i = 0; i < length; i++) {
+            const key = this.read();
+            result[String(key)] = this.read();
+        }
+        return result;
+    }
+}
+
+export function decodeMsgpack(bytes: Uint8Array): unknown {
+    const reader = new MsgpackReader(bytes);
+    const value = reader.read();
+    if (!reader.done) throw new Error("Unexpected data after MessagePack value");
+    return value;
+}
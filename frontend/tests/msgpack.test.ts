@@ -0,0 +1,71 @@
+// frontend/tests/msgpack.test.ts
+// Декодер MessagePack против байтов, закодированных сервером
+// (fixtures/msgpack_cases.json пересоздает backend/tests/test_msgpack_fixtures.py).
+// Запуск: npm test (Node 22.6+, встроенный тест-раннер без зависимостей).
+import { test } from 'node:test';
+import assert from 'node:assert/strict';
+import { readFileSync } from 'node:fs';
+import { decodeMsgpack } from '../src/msgpack.ts';
+
+interface FixtureCase {
+    name: string;
+    hex: string;
+    value: unknown;
+}
+
+const cases: FixtureCase[] = JSON.parse(
+    readFileSync(new URL('./fixtures/msgpack_cases.json', import.meta.url), 'utf-8'),
+);
+
+function fromHex(hex: string): Uint8Array {
+    const bytes = new Uint8Array(hex.length / 2);
+    for (let i = 0; i < bytes.length; i++) bytes[i] = parseInt(hex.substr(i * 2, 2), 16);
+    return bytes;
+}
+
+function toHex(bytes: Uint8Array): string {
+    return Array.from(bytes, b => b.toString(16).padStart(2, '0')).join('');
+}
+
+// В JSON нет байтов: бинарные значения сравниваем в том же виде, что и в фикстурах
+function normalize(value: unknown): unknown {
+    if (value instanceof Uint8Array) return { $bin: toHex(value) };
+    if (Array.isArray(value)) return value.map(normalize);
+    if (value !== null && typeof value === 'object') {
+        return Object.fromEntries(Object.entries(value).map(([key, item]) => [key, normalize(item)]));
+    }
+    return value;
+}
+
+for (const fixture of cases) {
+    test(`decodes ${fixture.name}`, () => {
+        assert.deepEqual(normalize(decodeMsgpack(fromHex(fixture.hex))), fixture.value);
+    });
+}
+
+test('decodes a value that is a view into a larger buffer', () => {
+    const fixture = cases.find(c => c.name === 'compact assembly plan')!;
+    const payload = fromHex(fixture.hex);
+    const buffer = new Uint8Array(payload.length + 8);
+    buffer.set(payload, 4);
+    assert.deepEqual(decodeMsgpack(buffer.subarray(4, 4 + payload.length)), fixture.value);
+});
+
+test('binary values do not alias the input buffer', () => {
+    const input = fromHex('c4030001ff');
+    const decoded = decodeMsgpack(input) as Uint8Array;
+    input[2] = 0x7f;
+    assert.deepEqual(Array.from(decoded), [0x00, 0x01, 0xff]);
+});
+
+test('rejects truncated data', () => {
+    assert.throws(() => decodeMsgpack(fromHex('a5616263')), /Truncated/);
+});
+
+test('rejects trailing data', () => {
+    assert.throws(() => decodeMsgpack(fromHex('0101')), /Unexpected data/);
+});
+
+test('rejects ext types', () => {
+    assert.throws(() => decodeMsgpack(fromHex('d40100')), /Unsupported MessagePack type 0xd4/);
+});